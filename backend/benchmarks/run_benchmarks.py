@@ -0,0 +1,193 @@
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import contextlib
+import numpy as np
+
+# Path setup
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from benchmarks.synthetic import SyntheticCorpus, HashingEmbedder, FakeCrossEncoder
+from src.retrieval.local_search import LocalSearch
+from src.retrieval.global_search import GlobalSearch
+from src.retrieval.ranker import Ranker
+from src.llm.answer_generator import AnswerGenerator
+from src.llm.llm_client import LLMClient
+from src.llm.llm_backends import FakeLLMBackend
+
+STAGES = ["embed_query", "local_search", "global_search", "rerank", "generate", "subgraph"]
+
+def build_engines(corpus, rerank_cost_ms):
+    """
+    The real search / rerank / generation classes, wired to the synthetic corpus and fakes.
+    """
+    embedder = HashingEmbedder(corpus.dim)
+    start = time.perf_counter()
+    # Chunk embeddings feed the ranker's bi-encoder first stage, as the real chunk store does
+    chunk_embeddings = embedder.encode([c['text'] for c in corpus.chunks])
+    local_search = LocalSearch(
+        embedder=embedder,
+        graph=corpus.graph,
+        chunks=[dict(c, embedding=e) for c, e in zip(corpus.chunks, chunk_embeddings)],
+        entity_embeddings=embedder.encode(corpus.graph.nodes_of_type('entity'))
+    )
+    global_search = GlobalSearch(
+        embedder=embedder,
+        summaries=corpus.summaries,
+        comm_embeddings=embedder.encode(list(corpus.summaries.values()))
+    )
+    ranker = Ranker(model=FakeCrossEncoder(rerank_cost_ms))
+    ranker.set_corpus_version(local_search.chunks_version)
+    generator = AnswerGenerator(llm_client=LLMClient(backend=FakeLLMBackend(), cache=False))
+    build_seconds = time.perf_counter() - start
+    return embedder, local_search, global_search, ranker, generator, build_seconds
+
+def make_stage_calls(engines):
+    """
+    One callable per stage, each taking the pipeline state so far and returning its output.
+    Mirrors what /chat does for a single query.
+    """
+    embedder, local_search, global_search, ranker, generator, _ = engines
+    return {
+        "embed_query": lambda s: embedder.encode_query(s["query"]),
+        "local_search": lambda s: local_search.search(s["query"], top_k=ranker.first_stage_k,
+                                                      query_emb=s["embed_query"]),
+        "global_search": lambda s: global_search.search(s["query"], top_k=2, query_emb=s["embed_query"]),
+        "rerank": lambda s: ranker.rerank(s["local_search"], s["query"]),
+        "generate": lambda s: generator.generate(s["query"], s["rerank"][:3], s["global_search"]),
+        "subgraph": lambda s: local_search.subgraph_for_results(s["rerank"]),
+    }
+
+def run_query(calls, query, timings=None, peaks=None):
+    state = {"query": query}
+    for stage in STAGES:
+        if peaks is not None:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        state[stage] = calls[stage](state)
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings[stage].append(elapsed)
+        if peaks is not None:
+            peaks[stage] = max(peaks[stage], tracemalloc.get_traced_memory()[1] - before)
+    return state
+
+def summarize(latencies, peak_bytes):
+    ms = np.array(latencies) * 1000.0
+    return {
+        "count": len(ms),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "throughput_qps": round(len(ms) / (ms.sum() / 1000.0), 2) if ms.sum() else None,
+        "peak_kb": round(peak_bytes / 1024.0, 1),
+    }
+
+def benchmark_scale(scale, args):
+    print(f"\n=== Scale x{scale} ===")
+    start = time.perf_counter()
+    corpus = SyntheticCorpus(scale=scale, dim=args.dim, seed=args.seed, n_queries=args.queries)
+    corpus_seconds = time.perf_counter() - start
+    print(f"Corpus: {corpus.describe()} ({corpus_seconds:.1f}s)")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        engines = build_engines(corpus, args.rerank_cost_ms)
+    calls = make_stage_calls(engines)
+    ranker = engines[3]
+    queries = corpus.queries
+
+    # 1. Warm-up (first-touch allocations, lazily built structures)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in queries[:args.warmup]:
+            run_query(calls, query)
+
+    # 2. Timed pass (rerank scores start cold so the cross-encoder path is measured)
+    ranker.score_cache.clear()
+    timings = {stage: [] for stage in STAGES}
+    end_to_end = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in queries:
+            start = time.perf_counter()
+            run_query(calls, query, timings=timings)
+            end_to_end.append(time.perf_counter() - start)
+
+    # 3. Memory pass, separate because tracemalloc slows every allocation down
+    ranker.score_cache.clear()
+    peaks = {stage: 0 for stage in STAGES}
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for query in queries[:args.memory_queries]:
+            run_query(calls, query, peaks=peaks)
+    tracemalloc.stop()
+
+    stages = {stage: summarize(timings[stage], peaks[stage]) for stage in STAGES}
+    stages["end_to_end"] = summarize(end_to_end, max(peaks.values()))
+    for stage, result in stages.items():
+        print(f"{stage:>14}: p50 {result['p50_ms']:.3f} ms | p95 {result['p95_ms']:.3f} ms | "
+              f"p99 {result['p99_ms']:.3f} ms | {result['throughput_qps']} q/s | peak {result['peak_kb']} KB")
+
+    return {
+        "corpus": corpus.describe(),
+        "corpus_build_seconds": round(corpus_seconds, 2),
+        "engine_build_seconds": round(engines[-1], 2),
+        "stages": stages,
+    }
+
+def compare(results, baseline_path):
+    """
+    Prints p50 / p95 ratios against an earlier results file (> 1.0 means slower now).
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    print(f"\n=== Compared with {baseline_path} ===")
+    for scale, current in results["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if previous is None:
+            continue
+        for stage, now in current["stages"].items():
+            before = previous["stages"].get(stage)
+            if not before or not before["p50_ms"] or not before["p95_ms"]:
+                continue
+            print(f"x{scale} {stage:>14}: p50 {now['p50_ms'] / before['p50_ms']:.2f}x | "
+                  f"p95 {now['p95_ms'] / before['p95_ms']:.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage latency / throughput / memory benchmark on a synthetic corpus")
+    parser.add_argument("--scale", type=float, nargs="+", default=[1.0],
+                        help="corpus size relative to the current book (e.g. 1 10 100)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--memory-queries", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rerank-cost-ms", type=float, default=0.0,
+                        help="simulated cross-encoder cost per (query, chunk) pair")
+    parser.add_argument("--out", default=os.path.join(BENCH_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        "scales": {},
+    }
+    for scale in args.scale:
+        results["scales"][f"{scale:g}"] = benchmark_scale(scale, args)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if args.baseline:
+        compare(results, args.baseline)
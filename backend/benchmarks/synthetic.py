@@ -0,0 +1,189 @@
+import time
+import hashlib
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from src.graph.graph_snapshot import GraphView, NODE_TYPE_CODES
+from src.graph.cooccurrence import cooccurrence_edges
+
+# Size of the current book's artifacts; --scale multiplies these
+BASE_CHUNKS = 1800
+BASE_ENTITIES = 5000
+BASE_COMMUNITIES = 425
+
+SYLLABLES = ["ka", "ra", "mo", "ti", "ven", "dal", "su", "pri", "no", "bha", "lek", "sam",
+             "tor", "vi", "gan", "she", "ru", "dho", "mal", "ni", "cha", "per", "zu", "lo"]
+FILLER = ("the of and to in that is was for it as with by on not be are this which or from "
+          "society people law social system rights order history religion state power class").split()
+
+class HashingEmbedder:
+    """
+    Stand-in for the sentence-transformer: L2-normalized hashed bag of words.
+    Deterministic, model-free, and texts sharing words get positive cosine similarity.
+    """
+    def __init__(self, dim=384):
+        self.dim = dim
+        self.vectorizer = HashingVectorizer(n_features=dim, alternate_sign=False, norm='l2')
+
+    def encode(self, texts, **kwargs):
+        return self.vectorizer.transform(texts).toarray().astype(np.float32)
+
+    def encode_query(self, query):
+        return self.encode([query])
+
+class FakeCrossEncoder:
+    """
+    Stand-in for the CrossEncoder: scores a pair by query-word overlap.
+    cost_per_pair_ms optionally burns CPU per pair to mimic model inference.
+    """
+    def __init__(self, cost_per_pair_ms=0.0):
+        self.cost = cost_per_pair_ms / 1000.0
+        self.pairs = 0
+
+    def predict(self, pairs):
+        scores = []
+        for query, text in pairs:
+            query_words = set(query.lower().split())
+            text_words = set(text.lower().split())
+            scores.append(len(query_words & text_words) / (len(query_words) or 1))
+            if self.cost:
+                # Busy-wait rather than sleep, so it competes for CPU like inference would
+                deadline = time.perf_counter() + self.cost
+                while time.perf_counter() < deadline:
+                    pass
+        self.pairs += len(pairs)
+        return np.array(scores, dtype=np.float32)
+
+def make_names(rng, n, words=2):
+    """
+    n distinct pronounceable multi-word names ("Kara Vendal").
+    """
+    names, seen = [], set()
+    while len(names) < n:
+        parts = []
+        for _ in range(words):
+            syllables = rng.choice(SYLLABLES, size=rng.integers(2, 4))
+            parts.append("".join(syllables).capitalize())
+        name = " ".join(parts)
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+class SyntheticCorpus:
+    """
+    Generated chunks, entities, communities and graph with the same shape as the real
+    artifacts: each chunk belongs to one topic (community), mentions a Zipf-skewed handful
+    of that topic's entities plus a few from elsewhere, and is padded with filler words.
+    """
+    def __init__(self, scale=1.0, dim=384, seed=0, n_queries=200, entities_per_chunk=8, chunk_words=180):
+        rng = np.random.default_rng(seed)
+        self.scale = scale
+        self.dim = dim
+        n_chunks = max(10, int(BASE_CHUNKS * scale))
+        n_entities = max(20, int(BASE_ENTITIES * scale))
+        n_topics = max(2, int(BASE_COMMUNITIES * scale))
+
+        self.entities = make_names(rng, n_entities)
+        entity_topic = rng.integers(0, n_topics, size=n_entities)
+        topic_members = [np.flatnonzero(entity_topic == t) for t in range(n_topics)]
+        chunk_topic = rng.integers(0, n_topics, size=n_chunks)
+
+        self.chunks = []
+        self.chunk_entities = []
+        for chunk_id, topic in enumerate(chunk_topic):
+            members = topic_members[topic]
+            if len(members) == 0:
+                members = np.arange(n_entities)
+            # Zipf-skewed picks inside the topic, plus a couple of off-topic mentions
+            local = members[np.minimum(rng.zipf(1.5, size=entities_per_chunk) - 1, len(members) - 1)]
+            stray = rng.integers(0, n_entities, size=2)
+            picked = list(dict.fromkeys(self.entities[i] for i in np.concatenate([local, stray])))
+
+            words = list(rng.choice(FILLER, size=chunk_words))
+            for name in picked:
+                words.insert(int(rng.integers(0, len(words))), name)
+            self.chunks.append({"id": chunk_id, "text": " ".join(words)})
+            self.chunk_entities.append(picked)
+
+        # One community per topic: its chunks and entities; summary names its main entities
+        self.communities = {}
+        self.summaries = {}
+        for topic in range(n_topics):
+            members = [f"CHUNK_{i}" for i in np.flatnonzero(chunk_topic == topic)]
+            names = [self.entities[i] for i in topic_members[topic][:6]]
+            self.communities[str(topic)] = members + names
+            self.summaries[str(topic)] = (
+                "This group of text discusses " + ", ".join(names or ["society"]) +
+                " and how they shaped social order and rights."
+            )
+
+        self.graph = self.build_graph()
+        self.queries = self.make_queries(rng, n_queries)
+
+    def build_graph(self):
+        """
+        GraphView built straight from sparse matrices (no NetworkX, so large scales stay cheap).
+        Same structure as GraphBuilder: chunk-entity edges plus weighted co-occurrence edges.
+        """
+        names, rows, cols, weights = cooccurrence_edges(self.chunk_entities)
+        entity_ids = {name: i for i, name in enumerate(names)}
+        n_entities, n_chunks = len(names), len(self.chunks)
+
+        cooc = sparse.coo_matrix((weights, (rows, cols)), shape=(n_entities, n_entities))
+        cooc = (cooc + cooc.T).tocsr()
+
+        inc_rows = [entity_ids[e] for entities in self.chunk_entities for e in entities]
+        inc_cols = [c for c, entities in enumerate(self.chunk_entities) for _ in entities]
+        incidence = sparse.csr_matrix(
+            (np.ones(len(inc_rows)), (inc_rows, inc_cols)), shape=(n_entities, n_chunks)
+        )
+
+        # Node order: entities, then chunks
+        adjacency = sparse.bmat([[cooc, incidence], [incidence.T, None]], format='csr')
+        adjacency.sort_indices()
+        node_type = np.concatenate([
+            np.full(n_entities, NODE_TYPE_CODES['entity'], dtype=np.int8),
+            np.full(n_chunks, NODE_TYPE_CODES['chunk'], dtype=np.int8),
+        ])
+        arrays = {
+            "node_type": node_type,
+            "indptr": adjacency.indptr.astype(np.int64),
+            "indices": adjacency.indices.astype(np.int32),
+            "weights": adjacency.data.astype(np.float32),
+        }
+        node_names = list(names) + [f"CHUNK_{c['id']}" for c in self.chunks]
+        version = hashlib.sha256(f"synthetic:{self.scale}:{len(node_names)}".encode()).hexdigest()[:16]
+        return GraphView(node_names, arrays, version)
+
+    def make_queries(self, rng, n=200):
+        """
+        Fixed query set: questions naming one or two entities, plus some with no entity at all.
+        """
+        templates = [
+            "What does the book say about {a}?",
+            "How is {a} related to {b}?",
+            "Explain the role of {a} in social order",
+            "Why did {a} oppose {b} and the caste system?",
+        ]
+        queries = []
+        for i in range(n):
+            if i % 10 == 9:
+                queries.append(f"What are the major social themes of part {i // 10 + 1}?")
+                continue
+            a, b = rng.choice(len(self.entities), size=2, replace=False)
+            template = templates[i % len(templates)]
+            queries.append(template.format(a=self.entities[a], b=self.entities[b]))
+        return queries
+
+    def describe(self):
+        return {
+            "scale": self.scale,
+            "chunks": len(self.chunks),
+            "entities": len(self.entities),
+            "communities": len(self.communities),
+            "graph_nodes": self.graph.number_of_nodes(),
+            "graph_edges": self.graph.number_of_edges(),
+            "embedding_dim": self.dim,
+        }
@@ -1,15 +1,47 @@
 import sys
 import os
-import networkx as nx
+import json
+import asyncio
+import functools
+import time
+import hashlib
+import threading
+import yaml
 import numpy as np
-from fastapi import FastAPI, HTTPException
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from src.pipeline.ambedkargpt import AmbedkarGPT
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BASE_DIR)
+from src.pipeline.ambedkargpt import AmbedkarGPT, build_context_payload
+from src.llm.llm_client import LLM_ERROR_MESSAGE
+from src.monitoring.metrics import metrics
 
-app = FastAPI(title="AmbedkarGPT API")
+with open(os.path.join(BASE_DIR, "config.yaml"), "r") as f:
+    config = yaml.safe_load(f)
+
+bot = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global bot
+    print("🚀 Booting up AmbedkarGPT Core...")
+    # Components load on background threads, so the server (and /healthz) is up immediately;
+    # /readyz reports progress and the query endpoints answer 503 until loading is done
+    try:
+        bot = AmbedkarGPT(background=True)
+    except Exception as e:
+        print(f"❌ Error initializing system: {e}")
+        bot = None
+    yield
+
+app = FastAPI(title="AmbedkarGPT API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,92 +50,270 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-print("🚀 Booting up AmbedkarGPT Core...")
-try:
-    bot = AmbedkarGPT()
-    print("✅ System Ready!")
-except Exception as e:
-    print(f"❌ Error initializing system: {e}")
-    bot = None
+def require_bot():
+    if bot is None or bot.startup.failed:
+        raise HTTPException(status_code=500, detail="System offline")
+    if not bot.ready:
+        raise HTTPException(status_code=503, detail="System is starting up", headers={"Retry-After": "5"})
+
+# Bounded pool for the CPU-bound retrieval stages, so they never starve the event loop
+# (the LLM call is awaited directly and does not occupy a worker)
+retrieval_executor = ThreadPoolExecutor(
+    max_workers=config.get('server', {}).get('retrieval_workers', 4),
+    thread_name_prefix="retrieval"
+)
+
+async def run_in_pool(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(retrieval_executor, functools.partial(fn, *args, **kwargs))
+
+async def run_stage(stage, fn, *args, **kwargs):
+    # Timed as seen by the request, so time spent queued for a worker counts too
+    with metrics.span(stage):
+        return await run_in_pool(fn, *args, **kwargs)
+
+async def timed(stage, awaitable):
+    with metrics.span(stage):
+        return await awaitable
 
 class QueryRequest(BaseModel):
     query: str
 
-def sanitize_results(results):
+def get_subgraph_for_results(results, max_nodes=20):
+    if not bot: return {"nodes": [], "links": []}
+    return bot.local_search.subgraph_for_results(results, max_nodes=max_nodes)
+
+async def cached_response(query):
     """
-    CRITICAL FIX: Converts NumPy types (float32) to standard Python types (float)
-    so JSON serialization doesn't crash.
+    Checks the response cache: exact normalized query first (no encoding needed),
+    then near-duplicates by embedding. Returns (cached payload or None, query_emb).
     """
-    clean_results = []
-    for r in results:
-        # Create a copy to avoid modifying original data
-        item = r.copy()
-        if 'score' in item:
-            item['score'] = float(item['score']) # Convert numpy.float32 -> float
-        if 'embedding' in item:
-            del item['embedding'] # Remove heavy embeddings if present
-        clean_results.append(item)
-    return clean_results
+    with metrics.span("cache_lookup"):
+        cached = bot.response_cache.get_exact(query)
+    if cached is not None:
+        return cached, None
+    query_emb = await run_stage("embed_query", bot.embedder.encode_query, query)
+    with metrics.span("cache_lookup"):
+        return bot.response_cache.get_similar(query_emb), query_emb
 
-def get_subgraph_for_results(results):
-    if not bot: return {"nodes": [], "links": []}
+async def retrieve(query, query_emb):
+    """
+    Runs local and global search concurrently on the pre-encoded query, then reranks.
+    Returns (reranked_local, global_results).
+    """
+    local_results, global_results = await asyncio.gather(
+        run_stage("local_search", bot.local_search.search, query, top_k=bot.ranker.first_stage_k, query_emb=query_emb),
+        run_stage("global_search", bot.global_search.search, query, top_k=2, query_emb=query_emb)
+    )
+    metrics.count_candidates("local_results", len(local_results))
+    metrics.count_candidates("global_results", len(global_results))
+    reranked_local = await run_stage("rerank", bot.ranker.rerank, local_results, query)
+    return reranked_local, global_results
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat")
+async def chat_endpoint(request: QueryRequest):
+    require_bot()
+    with metrics.span("chat_total"):
+        return await answer_chat(request.query)
+
+async def answer_chat(query):
+    # 0. Repeated / near-duplicate questions skip the whole pipeline
+    cached, query_emb = await cached_response(query)
+    if cached is not None:
+        metrics.record_request("chat", "cached")
+        return cached
     
-    full_graph = bot.local_search.graph
-    relevant_nodes = set()
+    # 1. Retrieval
+    reranked_local, global_results = await retrieve(query, query_emb)
     
-    retrieved_text = " ".join([r['text'] for r in results])
+    # 2. Generation (non-blocking) + 3. Dynamic Graph, side by side
+    final_answer, dynamic_graph = await asyncio.gather(
+        timed("generate", bot.generator.agenerate(query, reranked_local[:3], global_results[:2])),
+        run_stage("subgraph", get_subgraph_for_results, reranked_local[:3])
+    )
     
-    for node in full_graph.nodes():
-        if node.lower() in retrieved_text.lower():
-            relevant_nodes.add(node)
-            
-    if len(relevant_nodes) > 20:
-        relevant_nodes = list(relevant_nodes)[:20]
-        
-    subgraph = full_graph.subgraph(relevant_nodes)
-    return nx.node_link_data(subgraph)
+    response = {
+        "answer": final_answer,
+        **build_context_payload(reranked_local, global_results, dynamic_graph)
+    }
+    if not final_answer.startswith(LLM_ERROR_MESSAGE):
+        bot.response_cache.put(query, query_emb, response)
+        metrics.record_request("chat", "generated")
+    else:
+        metrics.record_request("chat", "error")
+    return response
 
-@app.post("/chat")
-def chat_endpoint(request: QueryRequest):
-    if not bot: raise HTTPException(status_code=500, detail="System offline")
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: QueryRequest):
+    """
+    Server-sent events version of /chat:
+    'context' (metrics, context, citations, graph_data) as soon as reranking finishes,
+    then one 'token' event per LLM chunk, then 'done' with the source key.
+    A failure after the stream has started ends it with an 'error' event.
+    """
+    require_bot()
     
     query = request.query
     
-    # 1. Retrieval
-    local_results = bot.local_search.search(query, top_k=5)
-    global_results = bot.global_search.search(query, top_k=2)
-    reranked_local = bot.ranker.rerank(local_results, query)
+    async def event_stream():
+        start = time.perf_counter()
+        try:
+            async for event in answer_stream(query):
+                yield event
+        except Exception as e:
+            # The response has started, so the failure has to travel as an event
+            print(f"Error while streaming: {e}")
+            metrics.record_request("stream", "error")
+            yield sse_event("error", {"detail": "Failed to answer the question"})
+        metrics.observe("stream_total", time.perf_counter() - start)
     
-    # 2. Generation
-    final_answer = bot.generator.generate(query, reranked_local[:3], global_results[:2])
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client as they are generated
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def answer_stream(query):
+    cached, query_emb = await cached_response(query)
+    if cached is not None:
+        # Replay the cached answer as a single token, with its source key in 'done' as usual
+        text, sources = bot.generator.split_sources(cached["answer"])
+        yield sse_event("context", {k: v for k, v in cached.items() if k != "answer"})
+        yield sse_event("token", {"text": text})
+        yield sse_event("done", {"sources": sources})
+        metrics.record_request("stream", "cached")
+        return
     
-    # 3. Dynamic Graph
-    dynamic_graph = get_subgraph_for_results(reranked_local[:3])
+    reranked_local, global_results = await retrieve(query, query_emb)
+    dynamic_graph = await run_stage("subgraph", get_subgraph_for_results, reranked_local[:3])
+    prompt, citation_map = bot.generator.build_prompt(query, reranked_local[:3], global_results[:2])
     
-    # 4. SANITIZE DATA BEFORE RETURNING (The Fix)
-    clean_local = sanitize_results(reranked_local[:3])
-    clean_global = sanitize_results(global_results[:2])
+    payload = build_context_payload(reranked_local, global_results, dynamic_graph)
+    yield sse_event("context", {**payload, "citations": citation_map})
     
-    top_score = clean_local[0]['score'] if clean_local else 0.0
+    tokens = []
+    generate_start = time.perf_counter()
+    async for token in bot.generator.astream(prompt):
+        if not tokens:
+            metrics.observe("first_token", time.perf_counter() - generate_start)
+        tokens.append(token)
+        yield sse_event("token", {"text": token})
+    metrics.observe("generate", time.perf_counter() - generate_start)
     
-    return {
-        "answer": final_answer,
-        "metrics": {
-            "confidence": float(top_score),
-            "source_count": len(clean_local) + len(clean_global),
-        },
-        "context": {
-            "local": clean_local,
-            "global": clean_global
-        },
-        "graph_data": dynamic_graph
-    }
+    sources = bot.generator.format_sources(citation_map)
+    yield sse_event("done", {"sources": sources})
+    
+    # Same shape as a /chat response, so either endpoint can serve it next time
+    answer = "".join(tokens)
+    if answer != LLM_ERROR_MESSAGE:
+        bot.response_cache.put(query, query_emb, {"answer": answer + sources, **payload})
+        metrics.record_request("stream", "generated")
+    else:
+        metrics.record_request("stream", "error")
 
-@app.get("/graph")
-def graph_endpoint():
-    if not bot: return {"nodes": [], "links": []}
+@app.get("/healthz")
+def healthz():
+    """
+    Liveness: the process is up and serving, whether or not the models have loaded.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness: 200 once every component has loaded (and warmed up, if enabled), else 503.
+    The body lists each component's load state and time.
+    """
+    if bot is None:
+        return JSONResponse(status_code=503, content={"ready": False, "error": "System offline"})
+    status = bot.startup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """
+    Prometheus scrape endpoint: per-stage latency histograms, request counters,
+    prompt sizes, candidate counts and cache hit rates.
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Pre-encoded /graph payloads: (graph version, limit, community) -> (body bytes, ETag).
+# /graph is a sync endpoint, so these are shared between threadpool threads.
+GRAPH_CACHE_SIZE = 64
+graph_payload_cache = OrderedDict()
+graph_cache_lock = threading.Lock()
+communities = None
+communities_version = None
+
+def get_communities(version):
+    """
+    Community -> member nodes, reloaded whenever the graph version changes
+    (the community file is rebuilt together with the graph).
+    """
+    global communities, communities_version
+    with graph_cache_lock:
+        if communities is None or communities_version != version:
+            comm_path = os.path.join(BASE_DIR, config['paths']['community_path'])
+            with open(comm_path, 'r') as f:
+                communities = json.load(f)
+            communities_version = version
+        return communities
+
+def get_graph_payload(limit, community):
+    """
+    Builds and JSON-encodes the top-N degree subgraph once per graph version,
+    then serves the cached bytes.
+    """
     G = bot.local_search.graph
-    degrees = sorted(G.degree, key=lambda x: x[1], reverse=True)
-    top_nodes = [n for n, d in degrees[:300]]
-    subgraph = G.subgraph(top_nodes)
-    return nx.node_link_data(subgraph)
\ No newline at end of file
+    key = (G.version, limit, community)
+    with graph_cache_lock:
+        if key in graph_payload_cache:
+            graph_payload_cache.move_to_end(key)
+            return graph_payload_cache[key]
+
+    candidates = None
+    if community is not None:
+        candidates = get_communities(G.version).get(community)
+        if candidates is None:
+            raise HTTPException(status_code=404, detail=f"Unknown community: {community}")
+
+    # Built outside the lock: a concurrent miss on the same key just encodes the same bytes twice
+    top_nodes = G.top_degree_nodes(limit, candidates=candidates)
+    body = json.dumps(G.subgraph_data(top_nodes), separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    with graph_cache_lock:
+        graph_payload_cache[key] = (body, etag)
+        graph_payload_cache.move_to_end(key)
+        while len(graph_payload_cache) > GRAPH_CACHE_SIZE:
+            graph_payload_cache.popitem(last=False)
+    return body, etag
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+@app.get("/graph")
+def graph_endpoint(
+    request: Request,
+    limit: int = Query(300, ge=1, le=5000),
+    community: Optional[str] = None
+):
+    if not bot or not bot.ready: return {"nodes": [], "links": []}
+    body, etag = get_graph_payload(limit, community)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,93 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+
+def normalize_query(query):
+    """
+    Canonical form used as a cache key: lower-case, no punctuation, single spaces.
+    """
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return re.sub(r"\s+", " ", query).strip()
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with optional TTL and an approximate memory bound.
+    size_fn(value) estimates an entry's size in bytes when max_bytes is set.
+    """
+    def __init__(self, max_entries=1024, ttl_seconds=None, max_bytes=None, size_fn=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.size_fn = size_fn or (lambda value: 0)
+
+        self._data = OrderedDict()  # key -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, expires_at):
+        return expires_at is not None and time.monotonic() >= expires_at
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self.total_bytes -= size
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._expired(entry[1]):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.size_fn(value)
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self.total_bytes += size
+
+            # Evict least recently used entries until both bounds hold (always keep the new one)
+            while len(self._data) > 1 and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def items(self):
+        """
+        Snapshot of live (key, value) pairs, oldest first. Expired entries are dropped.
+        """
+        with self._lock:
+            for key in [k for k, (_, exp, _) in self._data.items() if self._expired(exp)]:
+                self._remove(key)
+            return [(k, v) for k, (v, _, _) in self._data.items()]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
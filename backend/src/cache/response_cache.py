@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+from src.cache.lru_cache import LRUCache, normalize_query
+
+def artifact_fingerprint(paths):
+    """
+    Cheap change detector for on-disk artifacts: hashes (path, mtime, size) of each file.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+        else:
+            digest.update(f"{path}:missing".encode("utf-8"))
+    return digest.hexdigest()
+
+class ResponseCache:
+    """
+    Two-layer answer cache in front of the full RAG pipeline:
+    1. exact match on the normalized query (no embedding needed)
+    2. near-duplicate match: cosine(query embedding, cached query embedding) >= similarity
+    Entries share one LRU (TTL + memory bound) and are dropped when the artifacts change.
+    """
+    def __init__(self, max_entries=1024, ttl_seconds=3600, max_bytes=64 * 1024 * 1024,
+                 similarity=0.92, artifact_paths=(), check_interval=5.0):
+        self.similarity = similarity
+        self.entries = LRUCache(
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+            max_bytes=max_bytes,
+            size_fn=self._entry_size
+        )
+        # Request-level counters (the LRU's own counters see internal lookups too)
+        self.lookups = 0
+        self.exact_hits = 0
+        self.similar_hits = 0
+
+        # Artifact change detection, re-checked at most every check_interval seconds
+        self.artifact_paths = list(artifact_paths)
+        self.check_interval = check_interval
+        self.fingerprint = artifact_fingerprint(self.artifact_paths)
+        self._last_check = time.monotonic()
+
+        # Normalized copy of every cached query embedding, rebuilt lazily after writes
+        self._matrix = None
+        self._matrix_keys = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry_size(entry):
+        query_emb, response = entry
+        return query_emb.nbytes + len(json.dumps(response, default=str))
+
+    def _check_artifacts(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        fingerprint = artifact_fingerprint(self.artifact_paths)
+        if fingerprint != self.fingerprint:
+            print("Artifacts changed, clearing response cache...")
+            self.fingerprint = fingerprint
+            self.invalidate()
+
+    def invalidate(self):
+        self.entries.clear()
+        with self._lock:
+            self._matrix = None
+            self._matrix_keys = []
+
+    def get_exact(self, query):
+        """
+        Returns the cached response for an identical (normalized) query, or None.
+        """
+        self._check_artifacts()
+        self.lookups += 1
+        entry = self.entries.get(normalize_query(query))
+        if entry is None:
+            return None
+        self.exact_hits += 1
+        return entry[1]
+
+    def get_similar(self, query_emb):
+        """
+        Returns the cached response whose query embedding is closest to query_emb,
+        if it clears the similarity cutoff; otherwise None.
+        """
+        with self._lock:
+            if self._matrix is None:
+                items = self.entries.items()
+                self._matrix_keys = [key for key, _ in items]
+                self._matrix = np.array([emb for _, (emb, _) in items]) if items else None
+            matrix, keys = self._matrix, self._matrix_keys
+
+        if matrix is None:
+            return None
+
+        query = np.reshape(query_emb, -1).astype(np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None
+
+        # The entry may have been evicted or expired since the matrix was built
+        entry = self.entries.get(keys[best])
+        if entry is None:
+            return None
+        self.similar_hits += 1
+        return entry[1]
+
+    def put(self, query, query_emb, response):
+        query_emb = np.reshape(query_emb, -1).astype(np.float32)
+        query_emb = query_emb / (np.linalg.norm(query_emb) or 1.0)
+        self.entries.put(normalize_query(query), (query_emb, response))
+        with self._lock:
+            self._matrix = None
+
+    def stats(self):
+        hits = self.exact_hits + self.similar_hits
+        return {
+            "entries": len(self.entries),
+            "bytes": self.entries.total_bytes,
+            "evictions": self.entries.evictions,
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.lookups - hits,
+            "hit_rate": hits / self.lookups if self.lookups else 0.0,
+        }
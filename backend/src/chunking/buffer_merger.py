@@ -5,10 +5,12 @@ class BufferMerger:
     def __init__(self, threshold=0.6, max_tokens=1024):
         self.threshold = threshold
         self.max_tokens = max_tokens
+        self.reset()
 
     def should_merge(self, current_chunk_emb, next_sent_emb, current_tokens, next_tokens):
         """
         Decides if the next sentence should be merged into the current buffer.
+        Stateless reference version; chunking itself uses add()/flush() below.
         """
         # 1. Check Token Limit
         if (current_tokens + next_tokens) >= self.max_tokens:
@@ -25,4 +27,83 @@ class BufferMerger:
         
         similarity = cosine_similarity(current_mean, next_sent)[0][0]
         
-        return similarity >= self.threshold
\ No newline at end of file
+        return similarity >= self.threshold
+
+    # --- Stateful merger: O(1) work per sentence ---
+    # cosine(mean, x) == cosine(sum, x), so a running sum is all the buffer needs.
+
+    def reset(self):
+        self.texts = []
+        self.tokens = 0
+        self._sum = None
+        self._count = 0
+
+    def _accepts(self, unit_emb, tokens):
+        if (self.tokens + tokens) >= self.max_tokens:
+            return False
+        if self._count == 0:
+            return True
+        norm = np.linalg.norm(self._sum)
+        similarity = float(self._sum @ unit_emb) / norm if norm else 0.0
+        return similarity >= self.threshold
+
+    def _emit(self):
+        chunk = {
+            "text": " ".join(self.texts),
+            "token_count": self.tokens,
+            "embedding": self._sum / self._count
+        }
+        self.reset()
+        return chunk
+
+    def add(self, text, emb, tokens):
+        """
+        Feeds one sentence. Returns the finished chunk (text, token_count, centroid embedding)
+        when this sentence starts a new one, otherwise None.
+        """
+        emb = np.asarray(emb, dtype=np.float64)
+        norm = np.linalg.norm(emb)
+        unit_emb = emb / norm if norm else emb
+
+        finished = None
+        # An empty buffer always takes the sentence, so no empty chunk is ever emitted
+        if self._count and not self._accepts(unit_emb, tokens):
+            finished = self._emit()
+
+        self.texts.append(text)
+        self.tokens += tokens
+        self._sum = emb.copy() if self._sum is None else self._sum + emb
+        self._count += 1
+        return finished
+
+    def flush(self):
+        """
+        Returns the chunk still in the buffer (or None) and clears it.
+        """
+        return self._emit() if self._count else None
+
+    def find_boundaries(self, embeddings, token_counts):
+        """
+        Batch mode: chunk start indices for a whole (n, dim) sentence-embedding matrix.
+        Gives the same boundaries as feeding the sentences through add() one by one.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+        if len(embeddings) == 0:
+            return []
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        units = embeddings / np.where(norms == 0, 1.0, norms)
+
+        boundaries = [0]
+        running_sum = embeddings[0].copy()
+        tokens = token_counts[0]
+        for i in range(1, len(embeddings)):
+            sum_norm = np.linalg.norm(running_sum)
+            similarity = float(running_sum @ units[i]) / sum_norm if sum_norm else 0.0
+            if (tokens + token_counts[i]) >= self.max_tokens or similarity < self.threshold:
+                boundaries.append(i)
+                running_sum = embeddings[i].copy()
+                tokens = token_counts[i]
+            else:
+                running_sum += embeddings[i]
+                tokens += token_counts[i]
+        return boundaries
@@ -0,0 +1,179 @@
+import os
+import json
+import hashlib
+import yaml
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+# ids / offsets / token counts / embeddings as .npy, all chunk texts in one UTF-8 blob
+ARRAY_FILES = ["ids", "offsets", "token_counts", "embeddings"]
+TEXT_FILE = "text.bin"
+META_FILE = "meta.json"
+
+def _columns(chunks):
+    """
+    Splits chunk dicts into columns. Chunks without an embedding get an empty (n, 0) matrix.
+    """
+    encoded = [c['text'].encode("utf-8") for c in chunks]
+    offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    if chunks and 'embedding' in chunks[0]:
+        embeddings = np.asarray([c['embedding'] for c in chunks], dtype=np.float32)
+    else:
+        embeddings = np.zeros((len(chunks), 0), dtype=np.float32)
+
+    arrays = {
+        "ids": np.array([c['id'] for c in chunks], dtype=np.int64),
+        "offsets": offsets,
+        "token_counts": np.array([c.get('token_count', len(c['text'].split())) for c in chunks], dtype=np.int32),
+        "embeddings": embeddings,
+    }
+    return arrays, b"".join(encoded)
+
+def _content_version(arrays, blob):
+    digest = hashlib.sha256()
+    for name in ARRAY_FILES:
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    digest.update(blob)
+    return digest.hexdigest()[:16]
+
+def write_chunk_store(chunks, out_dir, model_name=None):
+    """
+    Writes chunks (dicts with id, text, token_count, embedding) as a columnar store.
+    Files go to temp names first; meta.json goes last and marks the store complete.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    arrays, blob = _columns(chunks)
+
+    meta_path = os.path.join(out_dir, META_FILE)
+    # An old meta.json must not vouch for half-replaced columns
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    for name in ARRAY_FILES:
+        tmp_path = os.path.join(out_dir, f"{name}.npy.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, arrays[name])
+        os.replace(tmp_path, os.path.join(out_dir, f"{name}.npy"))
+    with open(os.path.join(out_dir, TEXT_FILE + ".tmp"), 'wb') as f:
+        f.write(blob)
+    os.replace(os.path.join(out_dir, TEXT_FILE + ".tmp"), os.path.join(out_dir, TEXT_FILE))
+
+    meta = {
+        "version": _content_version(arrays, blob),
+        "num_chunks": len(chunks),
+        "embedding_dim": int(arrays["embeddings"].shape[1]),
+        "model_name": model_name,
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+class ChunkStore:
+    """
+    Read-only chunk columns (memory-mapped when loaded from disk).
+    Lookup by chunk id is O(1); texts are decoded from the blob only when asked for.
+    """
+    def __init__(self, arrays, blob, version, source_path=None):
+        self.ids = arrays["ids"]
+        self.offsets = arrays["offsets"]
+        self.token_counts = arrays["token_counts"]
+        self.embeddings = arrays["embeddings"]
+        self.blob = blob
+        self.version = version
+        # File whose hash identifies this chunk set (for artifact fingerprints)
+        self.source_path = source_path
+
+        # Chunk ids are normally 0..n-1, so the id is the row; otherwise keep a dict
+        ids = np.asarray(self.ids)
+        self._row_of = None
+        if not np.array_equal(ids, np.arange(len(ids))):
+            self._row_of = {int(chunk_id): row for row, chunk_id in enumerate(ids)}
+
+    @classmethod
+    def load(cls, store_dir):
+        meta_path = os.path.join(store_dir, META_FILE)
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode='r')
+            for name in ARRAY_FILES
+        }
+        text_path = os.path.join(store_dir, TEXT_FILE)
+        # np.memmap refuses empty files
+        if os.path.getsize(text_path):
+            blob = np.memmap(text_path, dtype=np.uint8, mode='r')
+        else:
+            blob = np.zeros(0, dtype=np.uint8)
+        return cls(arrays, blob, meta["version"], source_path=meta_path)
+
+    @classmethod
+    def from_chunks(cls, chunks, source_path=None):
+        arrays, blob = _columns(chunks)
+        return cls(arrays, np.frombuffer(blob, dtype=np.uint8), _content_version(arrays, blob), source_path)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row_of(self, chunk_id):
+        if self._row_of is None:
+            if not 0 <= chunk_id < len(self.ids):
+                raise KeyError(chunk_id)
+            return int(chunk_id)
+        return self._row_of[int(chunk_id)]
+
+    def text_at(self, row):
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+    def text(self, chunk_id):
+        return self.text_at(self.row_of(chunk_id))
+
+    def embedding(self, chunk_id):
+        return self.embeddings[self.row_of(chunk_id)]
+
+    def get(self, chunk_id):
+        """
+        The chunk as a dict (without its embedding), like an entry of the old chunks.json.
+        """
+        row = self.row_of(chunk_id)
+        return {"id": int(self.ids[row]), "text": self.text_at(row), "token_count": int(self.token_counts[row])}
+
+    def texts(self):
+        return [self.text_at(row) for row in range(len(self))]
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield {"id": int(self.ids[row]), "text": self.text_at(row), "token_count": int(self.token_counts[row])}
+
+def chunk_store_dir():
+    return os.path.join(BASE_DIR, config['paths']['chunk_store'])
+
+def load_chunk_store():
+    """
+    Loads the columnar store if present, otherwise falls back to a legacy chunks.json.
+    """
+    store_dir = chunk_store_dir()
+    if os.path.exists(os.path.join(store_dir, META_FILE)):
+        print(f"Loading chunk store from {store_dir}...")
+        return ChunkStore.load(store_dir)
+
+    chunks_path = os.path.join(BASE_DIR, config['paths']['output_chunks'])
+    if not os.path.exists(chunks_path):
+        raise FileNotFoundError("Chunk store missing. Run chunker first.")
+    print(f"Chunk store missing, loading legacy {chunks_path}...")
+    with open(chunks_path, 'r') as f:
+        return ChunkStore.from_chunks(json.load(f), source_path=chunks_path)
+
+if __name__ == "__main__":
+    # Convert a legacy chunks.json into the columnar store without re-chunking
+    chunks_path = os.path.join(BASE_DIR, config['paths']['output_chunks'])
+    with open(chunks_path, 'r') as f:
+        chunks = json.load(f)
+    meta = write_chunk_store(chunks, chunk_store_dir(), config['chunking']['model_name'])
+    print(f"Chunk store written to {chunk_store_dir()}: {meta['num_chunks']} chunks.")
@@ -1,18 +1,15 @@
 import os
 import re
-import json
 import yaml
-import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pypdf import PdfReader
-import spacy
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
-# Import the helper we just made
-try:
-    from src.chunking.buffer_merger import BufferMerger
-except ImportError:
-    from buffer_merger import BufferMerger
+from src.chunking.buffer_merger import BufferMerger
+from src.chunking.chunk_store import write_chunk_store, chunk_store_dir
+from src.embeddings.embedding_service import get_embedding_service
+from src.nlp.spacy_loader import get_nlp
 
 # Load Config
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -21,12 +18,21 @@ CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
 with open(CONFIG_PATH, "r") as f:
     config = yaml.safe_load(f)
 
-nlp = spacy.load("en_core_web_sm")
+# Sentence splitting only needs the parser
+UNUSED_COMPONENTS = ["tagger", "attribute_ruler", "lemmatizer", "ner"]
+
+def extract_page_range(args):
+    """
+    Worker task: extracts the text of pages [start, end) from one PDF.
+    Module-level so it can be pickled into worker processes.
+    """
+    full_path, start, end = args
+    reader = PdfReader(full_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
 
 class SemanticChunker:
     def __init__(self):
-        print(f"Loading embedding model: {config['chunking']['model_name']}...")
-        self.model = SentenceTransformer(config['chunking']['model_name'])
+        self.embedder = get_embedding_service(config['chunking']['model_name'])
         
         # Initialize the separate Merger class [cite: 2280]
         self.merger = BufferMerger(
@@ -41,74 +47,107 @@ class SemanticChunker:
         text = re.sub(r"\s+", " ", text)
         return text.strip()
 
-    def get_sentences(self, pdf_path):
+    def iter_pages(self, pdf_path):
+        """
+        Yields page texts in order. Page ranges are extracted in parallel worker
+        processes, with at most 2 ranges per worker in flight to keep memory bounded.
+        """
         full_path = os.path.join(BASE_DIR, pdf_path)
         if not os.path.exists(full_path):
             raise FileNotFoundError(f"PDF not found at {full_path}")
             
-        reader = PdfReader(full_path)
-        full_text = ""
-        for page in reader.pages:
-            t = page.extract_text()
-            if t:
-                full_text += t + " "
+        num_pages = len(PdfReader(full_path).pages)
+        pages_per_task = config['chunking'].get('pages_per_task', 8)
+        workers = config['chunking'].get('pdf_workers', 4)
+        tasks = [(full_path, start, min(start + pages_per_task, num_pages))
+                 for start in range(0, num_pages, pages_per_task)]
+
+        if workers <= 1:
+            for task in tasks:
+                yield from extract_page_range(task)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(extract_page_range, task))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def iter_sentences(self, pdf_path):
+        """
+        Streams sentences page by page instead of parsing the whole book as one string.
+        The last sentence of each page window is held back and re-parsed together
+        with the next page, so sentences crossing a page break stay whole.
+        """
+        nlp = get_nlp(disable=UNUSED_COMPONENTS)
+        # Never let a held-back fragment grow past a fraction of spaCy's limit
+        max_carry = nlp.max_length // 4
+        carry = ""
+        
+        for page_text in self.iter_pages(pdf_path):
+            text = self.clean_text(page_text)
+            if not text:
+                continue
+            window = f"{carry} {text}" if carry else text
+            sentences = [sent.text for sent in nlp(window).sents]
+            carry = sentences.pop() if sentences else ""
+            if len(carry) > max_carry:
+                sentences.append(carry)
+                carry = ""
+            
+            # Filter noise (short segments)
+            for sent in sentences:
+                if len(sent) > 20:
+                    yield sent
         
-        full_text = self.clean_text(full_text)
-        doc = nlp(full_text)
-        # Filter noise (short segments)
-        return [sent.text for sent in doc.sents if len(sent.text) > 20]
+        if len(carry) > 20:
+            yield carry
+
+    def get_sentences(self, pdf_path):
+        return list(self.iter_sentences(pdf_path))
+
+    def iter_embedded(self, sentences, batch_size=None):
+        """
+        Encodes a sentence stream in bounded batches, yielding (sentence, embedding) pairs.
+        """
+        batch_size = batch_size or config['chunking'].get('embed_batch_size', 256)
+        batch = []
+        for sent in sentences:
+            batch.append(sent)
+            if len(batch) == batch_size:
+                yield from zip(batch, self.embedder.encode(batch))
+                batch = []
+        if batch:
+            yield from zip(batch, self.embedder.encode(batch))
 
     def chunk_data(self):
-        sentences = self.get_sentences(config['paths']['pdf_path'])
-        print(f"Generating embeddings for {len(sentences)} sentences...")
-        embeddings = self.model.encode(sentences)
+        sentences = self.iter_sentences(config['paths']['pdf_path'])
         
         chunks = []
-        current_chunk_text = []
-        current_chunk_emb = []
-        current_tokens = 0
         
-        print("Grouping sentences into semantic chunks...")
-        for i in tqdm(range(len(sentences))):
-            sent = sentences[i]
-            emb = embeddings[i]
-            tokens = len(sent.split())
-            
-            # Use the separate Merger Logic
-            should_merge = self.merger.should_merge(
-                current_chunk_emb, emb, current_tokens, tokens
-            )
-            
-            if should_merge:
-                current_chunk_text.append(sent)
-                current_chunk_emb.append(emb)
-                current_tokens += tokens
-            else:
-                # Save chunk
-                chunks.append({
-                    "id": len(chunks),
-                    "text": " ".join(current_chunk_text),
-                    "token_count": current_tokens,
-                    "embedding": np.mean(current_chunk_emb, axis=0).tolist()
-                })
-                # Start new chunk
-                current_chunk_text = [sent]
-                current_chunk_emb = [emb]
-                current_tokens = tokens
+        def save_chunk(chunk):
+            chunk["id"] = len(chunks)
+            chunks.append(chunk)
+        
+        print("Embedding and grouping sentences into semantic chunks...")
+        self.merger.reset()
+        for sent, emb in tqdm(self.iter_embedded(sentences), unit="sent"):
+            # The merger keeps a running centroid and hands back a chunk when one closes
+            finished = self.merger.add(sent, emb, len(sent.split()))
+            if finished is not None:
+                save_chunk(finished)
         
         # Save final piece
-        if current_chunk_text:
-            chunks.append({
-                "id": len(chunks),
-                "text": " ".join(current_chunk_text),
-                "token_count": current_tokens,
-                "embedding": np.mean(current_chunk_emb, axis=0).tolist()
-            })
+        finished = self.merger.flush()
+        if finished is not None:
+            save_chunk(finished)
             
-        output_path = os.path.join(BASE_DIR, config['paths']['output_chunks'])
-        with open(output_path, 'w') as f:
-            json.dump(chunks, f)
-        print(f"SUCCESS: Saved {len(chunks)} chunks to {output_path}")
+        output_dir = chunk_store_dir()
+        write_chunk_store(chunks, output_dir, config['chunking']['model_name'])
+        print(f"SUCCESS: Saved {len(chunks)} chunks to {output_dir}")
 
 if __name__ == "__main__":
     chunker = SemanticChunker()
@@ -0,0 +1,183 @@
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import yaml
+import numpy as np
+from scipy.stats import spearmanr
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+CONFIG_PATH = os.path.join(project_root, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+from src.embeddings.inference_backend import BACKENDS, CROSS_ENCODER_NAME, load_bi_encoder, load_cross_encoder
+
+SAMPLE_QUERIES = [
+    "What did Dr. Ambedkar say about the caste system?",
+    "Why did Ambedkar criticise the Hindu social order?",
+    "What is the annihilation of caste?",
+    "How did Ambedkar view untouchability?",
+    "What role did Ambedkar play in drafting the Constitution?",
+    "What were Ambedkar's views on democracy?",
+    "Why did Ambedkar convert to Buddhism?",
+    "What did Ambedkar think of Gandhi?",
+    "How should social reform come before political reform?",
+    "What is the connection between caste and the division of labour?",
+]
+
+def ranking_agreement(reference, candidate, k=10):
+    """
+    How closely candidate scores reproduce the reference ranking of the same items:
+    top-1 match, share of the reference top-k kept, and Spearman rank correlation.
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    k = min(k, len(reference))
+    ref_order = np.argsort(-reference, kind="stable")
+    cand_order = np.argsort(-candidate, kind="stable")
+    if np.ptp(reference) == 0 or np.ptp(candidate) == 0:
+        # Rank correlation is undefined for constant scores
+        spearman = float(np.ptp(reference) == np.ptp(candidate))
+    else:
+        spearman = float(spearmanr(reference, candidate).statistic)
+    return {
+        "top1": float(ref_order[0] == cand_order[0]),
+        "overlap_at_k": len(set(ref_order[:k]) & set(cand_order[:k])) / k,
+        "spearman": spearman,
+    }
+
+def mean_agreement(agreements):
+    return {key: round(float(np.mean([a[key] for a in agreements])), 4) for key in agreements[0]}
+
+def model_size_mb(model):
+    """
+    Serialized weight size (int8 weights count as packed). None for non-torch backends.
+    """
+    import torch
+    try:
+        buffer = io.BytesIO()
+        torch.save(model.state_dict(), buffer)
+    except Exception:
+        return None
+    return round(buffer.tell() / (1024 * 1024), 2)
+
+def _timed(fn, repeats):
+    fn()  # first call pays lazy init, not measured
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats * 1000.0
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+def bi_encoder_parity(reference, candidate, queries, passages, k=10, repeats=3):
+    """
+    Ranks every passage for every query with both models (passages encoded by the reference,
+    as they are in the stored chunk embeddings) and compares the rankings.
+    """
+    passage_emb = _normalize(reference.encode(passages))
+    ref_q, ref_ms = _timed(lambda: reference.encode(queries), repeats)
+    cand_q, cand_ms = _timed(lambda: candidate.encode(queries), repeats)
+    ref_q, cand_q = _normalize(ref_q), _normalize(cand_q)
+
+    ref_scores, cand_scores = ref_q @ passage_emb.T, cand_q @ passage_emb.T
+    return {
+        "agreement": mean_agreement([ranking_agreement(r, c, k) for r, c in zip(ref_scores, cand_scores)]),
+        "query_cosine": round(float(np.mean(np.sum(ref_q * cand_q, axis=1))), 4),
+        "reference_ms_per_query": round(ref_ms / len(queries), 3),
+        "candidate_ms_per_query": round(cand_ms / len(queries), 3),
+        "reference_mb": model_size_mb(reference),
+        "candidate_mb": model_size_mb(candidate),
+    }, ref_scores
+
+def cross_encoder_parity(reference, candidate, queries, candidates_per_query, k=5, repeats=3):
+    """
+    Scores each query's rerank candidates with both cross-encoders and compares the orderings.
+    """
+    pairs = [[q, text] for q, texts in zip(queries, candidates_per_query) for text in texts]
+    ref_flat, ref_ms = _timed(lambda: reference.predict(pairs), repeats)
+    cand_flat, cand_ms = _timed(lambda: candidate.predict(pairs), repeats)
+
+    agreements, start = [], 0
+    for texts in candidates_per_query:
+        end = start + len(texts)
+        agreements.append(ranking_agreement(ref_flat[start:end], cand_flat[start:end], k))
+        start = end
+    return {
+        "agreement": mean_agreement(agreements),
+        "reference_ms_per_pair": round(ref_ms / len(pairs), 3),
+        "candidate_ms_per_pair": round(cand_ms / len(pairs), 3),
+        "reference_mb": model_size_mb(reference),
+        "candidate_mb": model_size_mb(candidate),
+    }
+
+def parity_report(backend, queries, passages, bi_encoder_name=None, cross_encoder_name=CROSS_ENCODER_NAME,
+                  k=10, rerank_candidates=20, repeats=3):
+    """
+    Compares `backend` against the fp32 torch reference for both models.
+    The cross-encoder sees each query's top `rerank_candidates` passages, as in serving.
+    """
+    bi_encoder_name = bi_encoder_name or config['chunking']['model_name']
+    print(f"Bi-encoder parity: torch vs {backend} ({bi_encoder_name})...")
+    bi_report, ref_scores = bi_encoder_parity(
+        load_bi_encoder(bi_encoder_name, "torch"), load_bi_encoder(bi_encoder_name, backend),
+        queries, passages, k=k, repeats=repeats
+    )
+
+    print(f"Cross-encoder parity: torch vs {backend} ({cross_encoder_name})...")
+    candidates_per_query = [
+        [passages[i] for i in np.argsort(-scores)[:rerank_candidates]] for scores in ref_scores
+    ]
+    ce_report = cross_encoder_parity(
+        load_cross_encoder(cross_encoder_name, "torch"), load_cross_encoder(cross_encoder_name, backend),
+        queries, candidates_per_query, k=min(k, 5), repeats=repeats
+    )
+    return {"backend": backend, "queries": len(queries), "passages": len(passages),
+            "bi_encoder": bi_report, "cross_encoder": ce_report}
+
+def print_report(report, min_overlap=0.9):
+    print(f"\n=== torch vs {report['backend']} ({report['queries']} queries, {report['passages']} passages) ===")
+    for name, unit in [("bi_encoder", "query"), ("cross_encoder", "pair")]:
+        part = report[name]
+        agreement = part["agreement"]
+        print(f"{name:>14}: top-1 {agreement['top1']:.2%} | overlap@k {agreement['overlap_at_k']:.2%} | "
+              f"spearman {agreement['spearman']:.3f}")
+        print(f"{'':>14}  {part[f'reference_ms_per_{unit}']} -> {part[f'candidate_ms_per_{unit}']} ms/{unit} | "
+              f"{part['reference_mb']} -> {part['candidate_mb']} MB")
+        if agreement["overlap_at_k"] < min_overlap:
+            print(f"{'':>14}  ⚠️ overlap below {min_overlap:.0%}, rankings differ noticeably from torch")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ranking agreement and speed of an inference backend vs fp32 torch")
+    parser.add_argument("--backend", default=config.get('inference', {}).get('backend', 'torch'), choices=BACKENDS)
+    parser.add_argument("--queries", help="text file with one query per line (default: built-in samples)")
+    parser.add_argument("--passages", type=int, default=500, help="chunks sampled from the chunk store")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+
+    from src.chunking.chunk_store import load_chunk_store
+    store = load_chunk_store()
+    rows = np.random.default_rng(0).permutation(len(store))[:args.passages]
+    passages = [store.text_at(int(row)) for row in sorted(rows)]
+
+    queries = SAMPLE_QUERIES
+    if args.queries:
+        with open(args.queries, 'r') as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    report = parity_report(args.backend, queries, passages, k=args.k)
+    print_report(report)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.out}")
@@ -0,0 +1,80 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+class MicroBatcher:
+    """
+    Cross-request micro-batching: callers on any thread submit a few items,
+    a single worker thread concatenates pending submissions and runs batch_fn once,
+    flushing when the queue is drained, max_batch_size items are taken or max_wait_ms has passed.
+    Each caller gets back exactly the outputs for its own items.
+    """
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=2.0, name="micro-batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        # Running totals, handy for checking how well requests are being coalesced
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._start_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def submit(self, items):
+        """
+        Queues a list of items; returns a Future resolving to the list of their outputs.
+        """
+        future = Future()
+        if not items:
+            future.set_result([])
+            return future
+        self._ensure_worker()
+        self._queue.put((list(items), future))
+        return future
+
+    def __call__(self, items):
+        return self.submit(items).result()
+
+    def _collect(self):
+        # Block for the first submission, then take whatever else is already queued.
+        # An empty queue flushes at once, so a lone request never waits; submissions that
+        # arrive while batch_fn runs pile up and go out together in the next batch.
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size and time.monotonic() < deadline:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(request)
+            size += len(request[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            batch = [item for items, _ in pending for item in items]
+            try:
+                outputs = self.batch_fn(batch)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            offset = 0
+            for items, future in pending:
+                future.set_result(outputs[offset:offset + len(items)])
+                offset += len(items)
@@ -0,0 +1,74 @@
+import os
+import threading
+import yaml
+import numpy as np
+from src.embeddings.batch_scheduler import MicroBatcher
+from src.embeddings.inference_backend import load_bi_encoder
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+# One service per (model name, inference backend), shared by every component in the process
+_services = {}
+_services_lock = threading.Lock()
+
+class EmbeddingService:
+    def __init__(self, model_name, backend="torch"):
+        print(f"Loading embedding model: {model_name} ({backend})...")
+        self.model_name = model_name
+        self.backend = backend
+        # sentence_transformers (and torch) are only imported here, when a model is loaded
+        self.model = load_bi_encoder(model_name, backend)
+
+        # Queries from concurrent requests are encoded together in one forward pass
+        batching = config.get('batching', {})
+        self.query_batcher = None
+        if batching.get('enabled', False):
+            self.query_batcher = MicroBatcher(
+                self.model.encode,
+                max_batch_size=batching.get('max_batch_size', 32),
+                max_wait_ms=batching.get('max_wait_ms', 2),
+                name=f"encode-{model_name}"
+            )
+
+    def encode(self, texts, **kwargs):
+        """
+        Encodes a list of texts into a (n, dim) embedding matrix.
+        """
+        return self.model.encode(texts, **kwargs)
+
+    def encode_query(self, query):
+        """
+        Encodes a single query into a (1, dim) matrix, ready for cosine_similarity.
+        """
+        if self.query_batcher is not None:
+            return np.asarray(self.query_batcher([query]))
+        return self.model.encode([query])
+
+def get_embedding_service(model_name, backend="torch"):
+    """
+    Returns the process-wide EmbeddingService for model_name, loading it on first use.
+    Builds use the default fp32 backend; serving may pick a faster one (see inference_backend).
+    """
+    key = (model_name, backend)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = EmbeddingService(model_name, backend)
+        return _services[key]
+
+class LazyEmbeddingService:
+    """
+    Resolves to the shared EmbeddingService on first use. Lets the search engines load
+    their artifacts while the model itself is still loading on another thread.
+    """
+    def __init__(self, model_name, backend="torch"):
+        self.model_name = model_name
+        self.backend = backend
+
+    def encode(self, texts, **kwargs):
+        return get_embedding_service(self.model_name, self.backend).encode(texts, **kwargs)
+
+    def encode_query(self, query):
+        return get_embedding_service(self.model_name, self.backend).encode_query(query)
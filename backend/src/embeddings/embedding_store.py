@@ -0,0 +1,87 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+def file_hash(path, block_size=1 << 20):
+    """
+    SHA-256 of a file's contents, read in blocks so large artifacts stay cheap.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def text_hash(text):
+    """
+    SHA-256 of a string; the content address for per-chunk / per-community caches.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def embedding_key(model_name, source_path):
+    """
+    An embedding matrix is only valid for the model that produced it
+    and the exact source artifact it was computed from.
+    """
+    return f"{model_name}:{file_hash(source_path)}"
+
+def _meta_path(npy_path):
+    return os.path.splitext(npy_path)[0] + ".meta.json"
+
+def save_embeddings(npy_path, matrix, model_name, source_path):
+    """
+    Writes the matrix as float32 .npy plus a small sidecar holding its key.
+    Both files are written to a temp name first so readers never see a half-written artifact.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    meta = {
+        "key": embedding_key(model_name, source_path),
+        "model_name": model_name,
+        "source": os.path.basename(source_path),
+        "shape": list(matrix.shape),
+    }
+
+    tmp_npy = npy_path + ".tmp"
+    with open(tmp_npy, 'wb') as f:
+        np.save(f, matrix)
+    os.replace(tmp_npy, npy_path)
+
+    tmp_meta = _meta_path(npy_path) + ".tmp"
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, _meta_path(npy_path))
+
+def load_embeddings(npy_path, model_name, source_path):
+    """
+    Memory-maps a saved matrix (zero-copy).
+    Returns None if it is missing or was built from a different model/source.
+    """
+    meta_path = _meta_path(npy_path)
+    if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+        return None
+
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    if meta.get("key") != embedding_key(model_name, source_path):
+        return None
+
+    return np.load(npy_path, mmap_mode='r')
+
+def load_or_encode(npy_path, model_name, source_path, texts, encode_fn):
+    """
+    Returns the persisted embeddings for texts, re-encoding (and re-saving)
+    only when the stored key no longer matches.
+    """
+    embeddings = load_embeddings(npy_path, model_name, source_path)
+    if embeddings is not None and embeddings.shape[0] == len(texts):
+        print(f"Loaded {len(texts)} cached embeddings from {npy_path}")
+        return embeddings
+
+    print(f"Embedding cache stale or missing, encoding {len(texts)} texts...")
+    embeddings = encode_fn(texts)
+    try:
+        save_embeddings(npy_path, embeddings, model_name, source_path)
+    except OSError as e:
+        print(f"Could not persist embeddings to {npy_path}: {e}")
+    return embeddings
@@ -0,0 +1,75 @@
+import os
+import warnings
+import importlib.util
+import yaml
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+# "torch": fp32 PyTorch (reference), "torch-int8": dynamic int8 quantization of the Linear
+# layers, "onnx": ONNX Runtime via sentence-transformers (needs optimum[onnxruntime])
+BACKENDS = ("torch", "torch-int8", "onnx")
+CROSS_ENCODER_NAME = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+def serving_backend():
+    """
+    Backend for query encoding and reranking at serving time, from config.yaml.
+    Offline builds keep using the fp32 reference so stored embeddings do not depend on it.
+    """
+    return config.get('inference', {}).get('backend', 'torch')
+
+def check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "onnx":
+        missing = [m for m in ("optimum", "onnxruntime") if importlib.util.find_spec(m) is None]
+        if missing:
+            raise ImportError(f"The onnx inference backend needs {', '.join(missing)}: "
+                              f"pip install \"optimum[onnxruntime]\"")
+    return backend
+
+def _onnx_kwargs():
+    kwargs = {"backend": "onnx"}
+    # e.g. "onnx/model_qint8_avx512_vnni.onnx"; unset means onnx/model.onnx (exported on first load)
+    file_name = config.get('inference', {}).get('onnx_file')
+    if file_name:
+        kwargs["model_kwargs"] = {"file_name": file_name}
+    return kwargs
+
+def quantize_int8(model):
+    """
+    Replaces every nn.Linear with an int8 dynamically quantized one, in place.
+    Weights are stored as int8 and activations are quantized per batch, on CPU.
+    """
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+    model.to("cpu")
+    with warnings.catch_warnings():
+        # torch.ao.quantization is deprecated in favour of torchao but still ships
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", UserWarning)
+        quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+def load_bi_encoder(model_name, backend="torch"):
+    check_backend(backend)
+    from sentence_transformers import SentenceTransformer
+    if backend == "onnx":
+        return SentenceTransformer(model_name, **_onnx_kwargs())
+    if backend == "torch-int8":
+        return quantize_int8(SentenceTransformer(model_name, device="cpu"))
+    return SentenceTransformer(model_name)
+
+def load_cross_encoder(model_name=CROSS_ENCODER_NAME, backend="torch"):
+    check_backend(backend)
+    import torch
+    from sentence_transformers import CrossEncoder
+    # Raw logits whatever the model config says, so score margins (see Ranker) have fixed units
+    logits = {"activation_fn": torch.nn.Identity()}
+    if backend == "onnx":
+        return CrossEncoder(model_name, **logits, **_onnx_kwargs())
+    if backend == "torch-int8":
+        return quantize_int8(CrossEncoder(model_name, device="cpu", **logits))
+    return CrossEncoder(model_name, **logits)
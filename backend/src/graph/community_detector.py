@@ -1,6 +1,9 @@
 import community.community_louvain as community_louvain
 
 class CommunityDetector:
+    def __init__(self, seed=None):
+        self.seed = seed
+
     def detect(self, graph):
         """
         Detects communities in a NetworkX graph using Louvain algorithm.
@@ -8,7 +11,7 @@ class CommunityDetector:
         """
         # Louvain is standard for SemRAG community detection [cite: 2243]
         try:
-            partition = community_louvain.best_partition(graph)
+            partition = community_louvain.best_partition(graph, random_state=self.seed)
             return partition
         except Exception as e:
             print(f"Community Detection Error: {e}")
@@ -1,10 +1,29 @@
-import spacy
+import os
+import yaml
+from src.nlp.spacy_loader import get_nlp
 
-nlp = spacy.load("en_core_web_sm")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+# ents need ner; noun_chunks need tagger + attribute_ruler (POS) and parser (deps).
+# Nothing reads lemmas, so the lemmatizer is skipped.
+UNUSED_COMPONENTS = ["lemmatizer"]
 
 class EntityExtractor:
-    def extract_entities(self, text):
-        doc = nlp(text)
+    model_name = "en_core_web_sm"
+
+    def __init__(self, batch_size=None, n_process=None):
+        graph_cfg = config.get('graph', {})
+        self.batch_size = batch_size or graph_cfg.get('extraction_batch_size', 64)
+        self.n_process = n_process or graph_cfg.get('extraction_workers', 1)
+
+    @property
+    def nlp(self):
+        return get_nlp(self.model_name, disable=UNUSED_COMPONENTS)
+
+    def _entities_from_doc(self, doc):
         entities = []
         
         # 1. Named Entities (People, Orgs, Laws)
@@ -22,4 +41,17 @@ class EntityExtractor:
                 if len(clean_chunk) > 3 and len(clean_chunk) < 50:
                     entities.append(clean_chunk)
 
-        return list(set(entities))
\ No newline at end of file
+        # Unique, in first-seen order (deterministic across runs, unlike set())
+        return list(dict.fromkeys(entities))
+
+    def extract_entities(self, text):
+        return self._entities_from_doc(self.nlp(text))
+
+    def extract_batch(self, texts):
+        """
+        Streams texts through nlp.pipe in batches, across n_process worker processes.
+        Yields one entity list per text, in input order.
+        """
+        docs = self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process)
+        for doc in docs:
+            yield self._entities_from_doc(doc)
@@ -6,12 +6,13 @@ import networkx as nx
 from tqdm import tqdm
 
 # Import our modular components
-try:
-    from src.graph.entity_extractor import EntityExtractor
-    from src.graph.community_detector import CommunityDetector
-except ImportError:
-    from entity_extractor import EntityExtractor
-    from community_detector import CommunityDetector
+from src.graph.entity_extractor import EntityExtractor
+from src.graph.community_detector import CommunityDetector
+from src.graph.graph_snapshot import write_snapshot, META_FILE
+from src.graph.cooccurrence import cooccurrence_edges
+from src.embeddings.embedding_service import get_embedding_service
+from src.chunking.chunk_store import load_chunk_store
+from src.embeddings.embedding_store import load_or_encode, text_hash
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
@@ -21,38 +22,34 @@ with open(CONFIG_PATH, "r") as f:
 class GraphBuilder:
     def __init__(self):
         self.extractor = EntityExtractor()
-        self.detector = CommunityDetector()
+        self.detector = CommunityDetector(seed=config['graph'].get('louvain_seed'))
         self.graph = nx.Graph()
 
     def build_graph(self):
-        chunks_path = os.path.join(BASE_DIR, config['paths']['output_chunks'])
-        if not os.path.exists(chunks_path):
-            raise FileNotFoundError("chunks.json missing. Run chunker first.")
-
-        with open(chunks_path, 'r') as f:
-            chunks = json.load(f)
+        # Columnar store (or legacy chunks.json); embeddings are never read here
+        chunks = list(load_chunk_store())
 
         print("Building Knowledge Graph...")
-        for chunk in tqdm(chunks):
+        texts = [chunk['text'] for chunk in chunks]
+        chunk_entities = self.extract_all(texts)
+
+        for chunk, entities in zip(chunks, chunk_entities):
             chunk_id = f"CHUNK_{chunk['id']}"
-            text = chunk['text']
             
             # Add Chunk Node
-            self.graph.add_node(chunk_id, type="chunk", text=text)
+            self.graph.add_node(chunk_id, type="chunk", text=chunk['text'])
             
-            # Extract & Add Entities
-            entities = self.extractor.extract_entities(text)
+            # Add Entities
             for entity in entities:
                 self.graph.add_node(entity, type="entity")
                 self.graph.add_edge(chunk_id, entity)
-                
-                # Link Co-occurring Entities 
-                for other in entities:
-                    if entity != other:
-                        if self.graph.has_edge(entity, other):
-                            self.graph[entity][other]['weight'] += 1
-                        else:
-                            self.graph.add_edge(entity, other, weight=1)
+
+        # Link Co-occurring Entities in bulk (sparse B @ B.T instead of a per-chunk pair loop)
+        print("Linking co-occurring entities...")
+        names, rows, cols, weights = cooccurrence_edges(chunk_entities)
+        self.graph.add_weighted_edges_from(
+            (names[r], names[c], int(w)) for r, c, w in zip(rows, cols, weights)
+        )
 
         # Save Graph (GML for visual, PKL for app)
         nx.write_gml(self.graph, os.path.join(BASE_DIR, config['paths']['graph_path']))
@@ -61,9 +58,60 @@ class GraphBuilder:
         pkl_path = os.path.join(BASE_DIR, "processed", "knowledge_graph.pkl")
         with open(pkl_path, 'wb') as f:
             pickle.dump(self.graph, f)
+
+        # Compact binary snapshot for the serving path (no GML parsing at boot)
+        snapshot_dir = os.path.join(BASE_DIR, config['paths']['graph_snapshot'])
+        write_snapshot(self.graph, snapshot_dir)
             
         print(f"Graph Built: {self.graph.number_of_nodes()} nodes.")
 
+    def extract_all(self, texts):
+        """
+        Entity lists for every chunk text, in order.
+        Results are cached by text hash, so spaCy only runs on chunks it has not seen.
+        """
+        cache_path = os.path.join(BASE_DIR, config['paths']['entity_cache'])
+        cache = {}
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r') as f:
+                stored = json.load(f)
+            # Entities from a different spaCy model are not reusable
+            if stored.get("model") == self.extractor.model_name:
+                cache = stored["entities"]
+
+        keys = [text_hash(text) for text in texts]
+        reused = sum(1 for key in keys if key in cache)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cache}
+        print(f"Entity cache: {reused} chunks reused, {len(missing)} to extract.")
+
+        # Extract the rest in batches (nlp.pipe, optionally multi-process)
+        if missing:
+            extracted = self.extractor.extract_batch(list(missing.values()))
+            for entities, key in zip(tqdm(extracted, total=len(missing)), missing):
+                cache[key] = entities
+
+        # Only keep entries for the current chunks
+        cache = {key: cache[key] for key in keys}
+        with open(cache_path, 'w') as f:
+            json.dump({"model": self.extractor.model_name, "entities": cache}, f)
+        return [cache[key] for key in keys]
+
+    def save_entity_embeddings(self):
+        """
+        Encodes every entity node once, offline, so the server can memory-map
+        the matrix instead of re-encoding it at boot.
+        Node order matches the snapshot LocalSearch reads back.
+        Skipped when the snapshot is unchanged since the last encode.
+        """
+        model_name = config['chunking']['model_name']
+        entity_nodes = [n for n, attr in self.graph.nodes(data=True) if attr.get('type') == 'entity']
+
+        out_path = os.path.join(BASE_DIR, config['paths']['entity_embeddings'])
+        snapshot_meta = os.path.join(BASE_DIR, config['paths']['graph_snapshot'], META_FILE)
+        load_or_encode(out_path, model_name, snapshot_meta, entity_nodes,
+                       get_embedding_service(model_name).encode)
+        print(f"Entity embeddings saved to {out_path}")
+
     def run_community_detection(self):
         print("Running Community Detection...")
         partition = self.detector.detect(self.graph)
@@ -83,4 +131,5 @@ class GraphBuilder:
 if __name__ == "__main__":
     builder = GraphBuilder()
     builder.build_graph()
+    builder.save_entity_embeddings()
     builder.run_community_detection()
\ No newline at end of file
@@ -0,0 +1,220 @@
+import os
+import json
+import hashlib
+import yaml
+import numpy as np
+import networkx as nx
+from scipy import sparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+# Node types are stored as int8 codes instead of per-node attribute dicts
+NODE_TYPES = ["entity", "chunk"]
+NODE_TYPE_CODES = {t: i for i, t in enumerate(NODE_TYPES)}
+
+ARRAY_FILES = ["node_type", "indptr", "indices", "weights"]
+META_FILE = "meta.json"
+
+def _content_version(names, arrays):
+    digest = hashlib.sha256()
+    digest.update(json.dumps(names).encode("utf-8"))
+    for name in ARRAY_FILES:
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()[:16]
+
+def _arrays_from_networkx(graph):
+    """
+    Interns node names to integer ids (graph order) and builds symmetric CSR adjacency.
+    Unweighted edges (chunk <-> entity) get weight 1.
+    """
+    names = list(graph.nodes())
+    node_type = np.array(
+        [NODE_TYPE_CODES[attr.get('type', 'entity')] for _, attr in graph.nodes(data=True)],
+        dtype=np.int8
+    )
+    adjacency = nx.to_scipy_sparse_array(graph, nodelist=names, weight='weight', format='csr')
+    adjacency.sort_indices()
+    arrays = {
+        "node_type": node_type,
+        "indptr": adjacency.indptr.astype(np.int64),
+        "indices": adjacency.indices.astype(np.int32),
+        "weights": adjacency.data.astype(np.float32),
+    }
+    return names, arrays
+
+def write_snapshot(graph, out_dir):
+    """
+    Writes a compact, memory-mappable snapshot of the graph:
+    one .npy per array plus meta.json holding the interned node names.
+    Chunk text is deliberately left out (it already lives in the chunk store).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    names, arrays = _arrays_from_networkx(graph)
+    for name in ARRAY_FILES:
+        np.save(os.path.join(out_dir, f"{name}.npy"), arrays[name])
+
+    meta = {
+        "version": _content_version(names, arrays),
+        "num_nodes": len(names),
+        "num_edges": graph.number_of_edges(),
+        "node_types": NODE_TYPES,
+        "nodes": names,
+    }
+    # meta.json goes last: its presence marks a complete snapshot
+    with open(os.path.join(out_dir, META_FILE), 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+class GraphView:
+    """
+    Read-only graph over CSR arrays (memory-mapped when loaded from a snapshot).
+    Covers the small part of the NetworkX API the serving path needs.
+    """
+    def __init__(self, names, arrays, version, source_path=None):
+        self.names = names
+        self.index = {n: i for i, n in enumerate(names)}
+        self.node_type = arrays["node_type"]
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.weights = arrays["weights"]
+        self.version = version
+        # File whose hash keys artifacts derived from this graph (e.g. entity embeddings)
+        self.source_path = source_path
+        self.degrees = np.diff(self.indptr)
+
+    @classmethod
+    def load(cls, snapshot_dir):
+        meta_path = os.path.join(snapshot_dir, META_FILE)
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode='r')
+            for name in ARRAY_FILES
+        }
+        return cls(meta["nodes"], arrays, meta["version"], source_path=meta_path)
+
+    @classmethod
+    def from_networkx(cls, graph, source_path=None):
+        names, arrays = _arrays_from_networkx(graph)
+        return cls(names, arrays, _content_version(names, arrays), source_path=source_path)
+
+    def number_of_nodes(self):
+        return len(self.names)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def nodes(self):
+        return self.names
+
+    def has_node(self, node):
+        return node in self.index
+
+    def get_type(self, node):
+        return NODE_TYPES[self.node_type[self.index[node]]]
+
+    def nodes_of_type(self, node_type):
+        """
+        Returns node names of one type, in graph order.
+        """
+        ids = np.flatnonzero(np.asarray(self.node_type) == NODE_TYPE_CODES[node_type])
+        return [self.names[i] for i in ids]
+
+    def incidence_matrix(self, row_type, col_type):
+        """
+        Sparse 0/1 matrix linking nodes of row_type to neighbouring nodes of col_type.
+        Rows and columns follow nodes_of_type() order.
+        """
+        node_type = np.asarray(self.node_type)
+        row_ids = np.flatnonzero(node_type == NODE_TYPE_CODES[row_type])
+        col_ids = np.flatnonzero(node_type == NODE_TYPE_CODES[col_type])
+
+        # Map global node id -> row/column position (-1 for other node types)
+        row_pos = np.full(len(self.names), -1, dtype=np.int64)
+        row_pos[row_ids] = np.arange(len(row_ids))
+        col_pos = np.full(len(self.names), -1, dtype=np.int64)
+        col_pos[col_ids] = np.arange(len(col_ids))
+
+        # Expand CSR to edge lists, keep only row_type -> col_type edges
+        rows = row_pos[np.repeat(np.arange(len(self.names)), self.degrees)]
+        cols = col_pos[np.asarray(self.indices)]
+        keep = (rows >= 0) & (cols >= 0)
+
+        return sparse.csr_matrix(
+            (np.ones(int(keep.sum()), dtype=np.float32), (rows[keep], cols[keep])),
+            shape=(len(row_ids), len(col_ids))
+        )
+
+    def neighbor_ids(self, node_id):
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def neighbors(self, node):
+        for j in self.neighbor_ids(self.index[node]):
+            yield self.names[j]
+
+    def degree(self, node):
+        return int(self.degrees[self.index[node]])
+
+    def top_degree_nodes(self, n, candidates=None):
+        """
+        Returns up to n node names ordered by degree (highest first).
+        candidates optionally restricts the pool to a subset of node names.
+        """
+        if candidates is None:
+            ids = np.arange(len(self.names))
+        else:
+            ids = np.array([self.index[c] for c in candidates if c in self.index], dtype=np.int64)
+        # Stable sort keeps graph order between equal degrees, like sorted(G.degree)
+        order = np.argsort(-self.degrees[ids], kind='stable')[:n]
+        return [self.names[i] for i in ids[order]]
+
+    def subgraph_data(self, nodes):
+        """
+        Equivalent of nx.node_link_data(G.subgraph(nodes)), without building a NetworkX graph.
+        """
+        ids = sorted(self.index[n] for n in nodes if n in self.index)
+        id_set = set(ids)
+
+        node_data = [{"type": NODE_TYPES[self.node_type[i]], "id": self.names[i]} for i in ids]
+        links = []
+        for i in ids:
+            start, end = self.indptr[i], self.indptr[i + 1]
+            for j, w in zip(self.indices[start:end], self.weights[start:end]):
+                # Each undirected edge once, in the same order NetworkX emits them
+                if j > i and j in id_set:
+                    link = {"source": self.names[i], "target": self.names[j]}
+                    # Only entity-entity co-occurrence edges carry a weight in the source graph
+                    if self.node_type[i] == self.node_type[j] == NODE_TYPE_CODES['entity']:
+                        link["weight"] = float(w)
+                    links.append(link)
+
+        return {
+            "directed": False,
+            "multigraph": False,
+            "graph": {},
+            "nodes": node_data,
+            "links": links
+        }
+
+def load_graph_view():
+    """
+    Loads the binary snapshot if present, otherwise falls back to parsing the GML file.
+    """
+    snapshot_dir = os.path.join(BASE_DIR, config['paths']['graph_snapshot'])
+    if os.path.exists(os.path.join(snapshot_dir, META_FILE)):
+        print(f"Loading Graph snapshot from {snapshot_dir}...")
+        return GraphView.load(snapshot_dir)
+
+    graph_path = os.path.join(BASE_DIR, config['paths']['graph_path'])
+    print(f"Snapshot missing, loading Graph from {graph_path}...")
+    return GraphView.from_networkx(nx.read_gml(graph_path), source_path=graph_path)
+
+if __name__ == "__main__":
+    # Convert an existing GML graph into a snapshot without rebuilding it
+    graph_path = os.path.join(BASE_DIR, config['paths']['graph_path'])
+    snapshot_dir = os.path.join(BASE_DIR, config['paths']['graph_snapshot'])
+    meta = write_snapshot(nx.read_gml(graph_path), snapshot_dir)
+    print(f"Snapshot written to {snapshot_dir}: {meta['num_nodes']} nodes, {meta['num_edges']} edges.")
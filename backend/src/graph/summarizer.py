@@ -1,9 +1,13 @@
 import json
 import os
 import yaml
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 # Import the LLM Client we just made
 from src.llm.llm_client import LLMClient
+from src.embeddings.embedding_service import get_embedding_service
+from src.embeddings.embedding_store import load_or_encode, text_hash
+from src.chunking.chunk_store import load_chunk_store
 
 # Load Config
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,8 +16,11 @@ with open(CONFIG_PATH, "r") as f:
     config = yaml.safe_load(f)
 
 class CommunitySummarizer:
-    def __init__(self):
-        self.llm_client = LLMClient()
+    def __init__(self, llm_client=None, workers=None):
+        # Any object with complete(prompt) works (e.g. a stand-in for tests)
+        self.llm_client = llm_client or LLMClient()
+        self.workers = workers or config['llm'].get('summary_workers', 1)
+        self.checkpoint_path = os.path.join(BASE_DIR, config['paths']['summary_checkpoint'])
 
     def load_data(self):
         # Load Communities
@@ -22,31 +29,22 @@ class CommunitySummarizer:
             self.communities = json.load(f)
 
         # Load Chunks (to get the actual text content)
-        chunks_path = os.path.join(BASE_DIR, config['paths']['output_chunks'])
-        with open(chunks_path, 'r') as f:
-            self.chunks_data = {f"CHUNK_{c['id']}": c['text'] for c in json.load(f)}
+        self.chunks_data = {f"CHUNK_{c['id']}": c['text'] for c in load_chunk_store()}
 
-    def generate_summaries(self):
-        self.load_data()
-        summaries = {}
-        
-        print(f"Generating summaries for {len(self.communities)} communities...")
-        print("Note: This relies on your Local LLM, so it might take a few minutes.")
+    @staticmethod
+    def community_key(texts):
+        """
+        Content address of a community summary: LLM settings plus its member chunk texts.
+        Unchanged membership gives the same key even if community ids are renumbered.
+        """
+        llm_cfg = config['llm']
+        return text_hash(json.dumps([llm_cfg['model_name'], llm_cfg['temperature'], sorted(texts)]))
 
-        for comm_id, nodes in tqdm(self.communities.items()):
-            # 1. Collect text from this community
-            # We look for nodes that are Chunks (start with "CHUNK_")
-            texts = [self.chunks_data[node] for node in nodes if node in self.chunks_data]
-            
-            # If no chunks in this community (only entities), skip or handle gracefully
-            if not texts:
-                continue
-                
-            # Limit context to avoid overflowing the LLM (take top 3 chunks)
-            combined_text = "\n".join(texts[:3])
-            
-            # 2. Create Prompt
-            prompt = f"""
+    @staticmethod
+    def build_prompt(texts):
+        # Limit context to avoid overflowing the LLM (take top 3 chunks)
+        combined_text = "\n".join(texts[:3])
+        return f"""
             You are an expert researcher. Read the following text segments derived from Dr. Ambedkar's book.
             Identify the central theme and write a concise summary (2-3 sentences) explaining what this group of text discusses.
             
@@ -55,18 +53,114 @@ class CommunitySummarizer:
             
             SUMMARY:
             """
+
+    def load_summary_cache(self):
+        cache_path = os.path.join(BASE_DIR, config['paths']['summary_cache'])
+        if not os.path.exists(cache_path):
+            return {}
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+
+    def load_checkpoint(self):
+        """
+        Summaries finished by an earlier, interrupted run: {community key: summary}.
+        A torn last line (crash mid-write) is ignored.
+        """
+        done = {}
+        if not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[record["key"]] = record["summary"]
+        return done
+
+    def summarize(self, texts):
+        return self.llm_client.complete(self.build_prompt(texts)).strip()
+
+    def generate_summaries(self):
+        self.load_data()
+        summaries = {}
+        # Earlier builds and an interrupted run both count as done
+        done = self.load_summary_cache()
+        resumed = self.load_checkpoint()
+        done.update(resumed)
+        fresh_cache = {}
+        
+        # 1. Collect text from each community and split into done / to do
+        # We look for nodes that are Chunks (start with "CHUNK_")
+        pending = {}
+        for comm_id, nodes in self.communities.items():
+            texts = [self.chunks_data[node] for node in nodes if node in self.chunks_data]
             
-            # 3. Call LLM
-            summary = self.llm_client.generate_answer(prompt)
-            summaries[comm_id] = summary.strip()
+            # If no chunks in this community (only entities), skip or handle gracefully
+            if not texts:
+                continue
+
+            key = self.community_key(texts)
+            if key in done:
+                summaries[comm_id] = fresh_cache[key] = done[key]
+            else:
+                pending[comm_id] = (key, texts)
 
-        # Save Summaries
-        output_path = os.path.join(BASE_DIR, "processed", "community_summaries.json")
+        print(f"Summaries: {len(summaries)} reused ({len(resumed)} from checkpoint), "
+              f"{len(pending)} to generate with {self.workers} concurrent requests...")
+        print("Note: This relies on your Local LLM, so it might take a few minutes.")
+
+        # 2. Call the LLM concurrently; every finished summary is appended to the checkpoint
+        failed = []
+        with open(self.checkpoint_path, 'a') as checkpoint, \
+                ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {
+                pool.submit(self.summarize, texts): comm_id
+                for comm_id, (key, texts) in pending.items()
+            }
+            # tqdm reports throughput and ETA as results come back
+            for future in tqdm(as_completed(futures), total=len(futures), unit="community"):
+                comm_id = futures[future]
+                key = pending[comm_id][0]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    print(f"Error summarizing community {comm_id}: {e}")
+                    failed.append(comm_id)
+                    continue
+                summaries[comm_id] = fresh_cache[key] = summary
+                checkpoint.write(json.dumps({"key": key, "community": comm_id, "summary": summary}) + "\n")
+                checkpoint.flush()
+
+        # Save Summaries, in community order regardless of completion order
+        summaries = {comm_id: summaries[comm_id] for comm_id in self.communities if comm_id in summaries}
+        output_path = os.path.join(BASE_DIR, config['paths']['summaries_path'])
         with open(output_path, 'w') as f:
             json.dump(summaries, f)
         
         print(f"Saved community summaries to {output_path}")
 
+        # Only summaries of current communities are kept; the checkpoint is folded in
+        cache_path = os.path.join(BASE_DIR, config['paths']['summary_cache'])
+        with open(cache_path, 'w') as f:
+            json.dump(fresh_cache, f)
+        os.remove(self.checkpoint_path)
+
+        self.save_summary_embeddings(summaries, output_path)
+
+        if failed:
+            # Failed communities are left out; re-running only retries those
+            raise RuntimeError(f"{len(failed)} communities could not be summarized; re-run to retry them.")
+        return summaries
+
+    def save_summary_embeddings(self, summaries, output_path):
+        # Persist summary embeddings so GlobalSearch can memory-map them at boot
+        model_name = config['chunking']['model_name']
+        emb_path = os.path.join(BASE_DIR, config['paths']['summary_embeddings'])
+        load_or_encode(emb_path, model_name, output_path, list(summaries.values()),
+                       get_embedding_service(model_name).encode)
+        print(f"Saved summary embeddings to {emb_path}")
+
 if __name__ == "__main__":
     summarizer = CommunitySummarizer()
     summarizer.generate_summaries()
\ No newline at end of file
@@ -1,12 +1,21 @@
 from .llm_client import LLMClient
 from .prompt_templates import PromptTemplates
+from src.monitoring.metrics import metrics
+
+# Separates the answer from the source key appended below it
+SOURCES_HEADER = "\n\n--- Sources ---\n"
 
 class AnswerGenerator:
-    def __init__(self):
-        self.llm = LLMClient()
+    def __init__(self, llm_client=None):
+        # Any LLMClient works, e.g. one on the fake backend for benchmarks
+        self.llm = llm_client or LLMClient()
         self.prompts = PromptTemplates()
 
-    def generate(self, query, local_context, global_context):
+    def build_prompt(self, query, local_context, global_context):
+        """
+        Formats the retrieved context with citation IDs.
+        Returns (prompt, citation_map).
+        """
         # Format Context with IDs for Citation
         full_context = ""
         citation_map = []
@@ -31,12 +40,48 @@ class AnswerGenerator:
 
         # Prepare Prompt
         prompt = self.prompts.get_answer_prompt(full_context, query)
+        metrics.record_prompt(prompt)
+        return prompt, citation_map
+
+    def format_sources(self, citation_map):
+        # Source Key shown to the user below the answer
+        return SOURCES_HEADER + "\n".join(citation_map)
+
+    @staticmethod
+    def split_sources(answer):
+        """
+        Splits a finished answer into (text, source key), e.g. to replay a cached answer as a stream.
+        """
+        index = answer.rfind(SOURCES_HEADER)
+        if index == -1:
+            return answer, ""
+        return answer[:index], answer[index:]
+
+    def generate(self, query, local_context, global_context):
+        prompt, citation_map = self.build_prompt(query, local_context, global_context)
         
         # Generate Answer
         print("   -> Sending prompt to LLM...")
         raw_answer = self.llm.generate_answer(prompt)
         
         # Append Source Key to the bottom for the user to see
-        final_output = f"{raw_answer}\n\n--- Sources ---\n" + "\n".join(citation_map)
+        return raw_answer + self.format_sources(citation_map)
+
+    async def agenerate(self, query, local_context, global_context):
+        """
+        Same as generate(), but awaits the LLM without blocking the event loop.
+        """
+        prompt, citation_map = self.build_prompt(query, local_context, global_context)
         
-        return final_output
\ No newline at end of file
+        print("   -> Sending prompt to LLM (async)...")
+        raw_answer = await self.llm.agenerate_answer(prompt)
+        
+        return raw_answer + self.format_sources(citation_map)
+
+    async def astream(self, prompt):
+        """
+        Streams LLM tokens for a prompt built with build_prompt().
+        """
+        print("   -> Streaming prompt to LLM...")
+        async for token in self.llm.astream_answer(prompt):
+            yield token
@@ -0,0 +1,154 @@
+import json
+import time
+import asyncio
+import hashlib
+import httpx
+
+# Worth retrying: the server was unreachable, slow, or briefly overloaded
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+class OllamaHTTPBackend:
+    """
+    Talks to Ollama's /api/generate over pooled keep-alive connections (one sync and
+    one async httpx client), with explicit timeouts and bounded retries.
+    """
+    def __init__(self, model_name, temperature, base_url="http://localhost:11434",
+                 connect_timeout=5.0, read_timeout=120.0, max_retries=2,
+                 backoff_seconds=0.5, pool_size=8):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.url = base_url.rstrip("/") + "/api/generate"
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.client = httpx.Client(timeout=self.timeout, limits=self.limits)
+        # Created on first async use, inside the running event loop
+        self._async_client = None
+
+    def _payload(self, prompt, stream):
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {"temperature": self.temperature},
+        }
+
+    @staticmethod
+    def _should_retry(error):
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRYABLE_STATUS
+        return isinstance(error, httpx.TransportError)
+
+    def _delay(self, attempt):
+        return self.backoff_seconds * (2 ** attempt)
+
+    def generate(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.post(self.url, json=self._payload(prompt, stream=False))
+                response.raise_for_status()
+                return response.json()["response"]
+            except httpx.HTTPError as e:
+                if attempt == self.max_retries or not self._should_retry(e):
+                    raise
+                print(f"LLM request failed ({e!r}), retrying...")
+                time.sleep(self._delay(attempt))
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._async_client
+
+    async def agenerate(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.async_client.post(self.url, json=self._payload(prompt, stream=False))
+                response.raise_for_status()
+                return response.json()["response"]
+            except httpx.HTTPError as e:
+                if attempt == self.max_retries or not self._should_retry(e):
+                    raise
+                print(f"LLM request failed ({e!r}), retrying...")
+                await asyncio.sleep(self._delay(attempt))
+
+    async def astream(self, prompt):
+        """
+        Yields response pieces from Ollama's NDJSON stream.
+        Retries only before the first piece; a stream cut midway raises.
+        """
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                async with self.async_client.stream("POST", self.url, json=self._payload(prompt, stream=True)) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        part = json.loads(line)
+                        if part.get("response"):
+                            started = True
+                            yield part["response"]
+                        if part.get("done"):
+                            return
+                return
+            except httpx.HTTPError as e:
+                if started or attempt == self.max_retries or not self._should_retry(e):
+                    raise
+                print(f"LLM request failed ({e!r}), retrying...")
+                await asyncio.sleep(self._delay(attempt))
+
+class FakeLLMBackend:
+    """
+    Deterministic stand-in for benchmarks and tests: same prompt, same answer, no server.
+    `delay` simulates generation time; `calls` counts prompts actually "generated".
+    """
+    def __init__(self, model_name="fake", temperature=0.0, delay=0.0, responses=None):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.delay = delay
+        self.responses = responses or {}
+        self.calls = 0
+
+    def _answer(self, prompt):
+        self.calls += 1
+        if prompt in self.responses:
+            return self.responses[prompt]
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"Fake answer {digest} [1]"
+
+    def generate(self, prompt):
+        if self.delay:
+            time.sleep(self.delay)
+        return self._answer(prompt)
+
+    async def agenerate(self, prompt):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self._answer(prompt)
+
+    async def astream(self, prompt):
+        words = (await self.agenerate(prompt)).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + " "
+
+def build_backend(llm_cfg):
+    """
+    Backend selected by config (llm.backend).
+    """
+    kind = llm_cfg.get('backend', 'ollama')
+    if kind == "fake":
+        return FakeLLMBackend(llm_cfg['model_name'], llm_cfg['temperature'])
+    if kind == "ollama":
+        return OllamaHTTPBackend(
+            llm_cfg['model_name'],
+            llm_cfg['temperature'],
+            base_url=llm_cfg.get('base_url', "http://localhost:11434"),
+            connect_timeout=llm_cfg.get('connect_timeout_seconds', 5),
+            read_timeout=llm_cfg.get('read_timeout_seconds', 120),
+            max_retries=llm_cfg.get('max_retries', 2),
+            pool_size=llm_cfg.get('pool_size', 8)
+        )
+    raise ValueError(f"Unknown LLM backend: {kind}")
@@ -1,7 +1,12 @@
 import yaml
 import os
-# NEW IMPORT: Using the dedicated package to avoid warnings
-from langchain_ollama import OllamaLLM
+import asyncio
+try:
+    from src.llm.llm_backends import build_backend
+    from src.llm.prompt_cache import PromptCache, prompt_key
+except ImportError:
+    from llm_backends import build_backend
+    from prompt_cache import PromptCache, prompt_key
 
 # Load Config
 # Adjust path logic to find config.yaml regardless of where this script is run
@@ -25,24 +30,102 @@ if not config_path:
 with open(config_path, "r") as f:
     config = yaml.safe_load(f)
 
+# Returned instead of an answer when the LLM call fails (never cached)
+LLM_ERROR_MESSAGE = "Sorry, I encountered an error generating the response."
+
 class LLMClient:
-    def __init__(self):
-        self.model_name = config['llm']['model_name']
-        self.temperature = config['llm']['temperature']
-        print(f"Initializing Ollama with model: {self.model_name}...")
-        
-        # NEW CLASS USAGE: OllamaLLM instead of Ollama
-        self.llm = OllamaLLM(
-            model=self.model_name,
-            temperature=self.temperature
-        )
+    def __init__(self, backend=None, cache=None):
+        """
+        backend: anything with generate / agenerate / astream (default: from config, llm.backend)
+        cache: a PromptCache (default: the shared on-disk cache, if llm.cache_enabled; False = none)
+        """
+        llm_cfg = config['llm']
+        self.model_name = llm_cfg['model_name']
+        self.temperature = llm_cfg['temperature']
+
+        if backend is None:
+            print(f"Initializing {llm_cfg.get('backend', 'ollama')} backend with model: {self.model_name}...")
+            backend = build_backend(llm_cfg)
+        self.backend = backend
+
+        if cache is None and llm_cfg.get('cache_enabled', True):
+            cache_path = os.path.join(os.path.dirname(os.path.abspath(config_path)), config['paths']['llm_cache'])
+            cache = PromptCache(cache_path, max_bytes=llm_cfg.get('cache_max_mb', 256) * 1024 * 1024)
+        self.cache = cache if cache is not False else None
+
+    def _key(self, prompt):
+        return prompt_key(self.model_name, self.temperature, prompt)
+
+    def _cached(self, prompt):
+        return self.cache.get(self._key(prompt)) if self.cache is not None else None
+
+    def _remember(self, prompt, response):
+        if self.cache is not None and response:
+            self.cache.put(self._key(prompt), response)
+
+    # The cache is SQLite on disk; async callers must not block the event loop on it
+    async def _acached(self, prompt):
+        return await asyncio.to_thread(self._cached, prompt) if self.cache is not None else None
+
+    async def _aremember(self, prompt, response):
+        if self.cache is not None and response:
+            await asyncio.to_thread(self._remember, prompt, response)
+
+    def complete(self, prompt):
+        """
+        Sends a prompt to the LLM and returns the text response; errors propagate.
+        For batch jobs that need to tell a failed call apart from an answer.
+        A cache hit skips generation entirely.
+        """
+        response = self._cached(prompt)
+        if response is None:
+            response = self.backend.generate(prompt)
+            self._remember(prompt, response)
+        return response
 
     def generate_answer(self, prompt):
         """
         Sends a prompt to the LLM and returns the text response.
         """
         try:
-            return self.llm.invoke(prompt)
+            return self.complete(prompt)
+        except Exception as e:
+            print(f"Error calling LLM: {e}")
+            return LLM_ERROR_MESSAGE
+
+    async def agenerate_answer(self, prompt):
+        """
+        Async variant of generate_answer, for use inside the event loop.
+        """
+        try:
+            response = await self._acached(prompt)
+            if response is None:
+                response = await self.backend.agenerate(prompt)
+                await self._aremember(prompt, response)
+            return response
+        except Exception as e:
+            print(f"Error calling LLM: {e}")
+            return LLM_ERROR_MESSAGE
+
+    async def astream_answer(self, prompt):
+        """
+        Yields the response text piece by piece as the LLM generates it.
+        A cached response is yielded in one piece; a completed stream is cached.
+        A failure before anything was yielded gives the canned error message; once pieces
+        have gone out it is re-raised, so the caller can end the stream as failed.
+        """
+        pieces = []
+        try:
+            cached = await self._acached(prompt)
+            if cached is not None:
+                yield cached
+                return
+            async for token in self.backend.astream(prompt):
+                pieces.append(token)
+                yield token
+            await self._aremember(prompt, "".join(pieces))
         except Exception as e:
             print(f"Error calling LLM: {e}")
-            return "Sorry, I encountered an error generating the response."
\ No newline at end of file
+            if pieces:
+                raise
+            yield LLM_ERROR_MESSAGE
@@ -0,0 +1,182 @@
+import os
+import time
+import bisect
+import threading
+import contextlib
+import yaml
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+# Seconds; spans from sub-millisecond index lookups up to long LLM generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+def _label_text(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_text(self.labelnames, key)} {_number(value)}")
+        return lines
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, Prometheus style. observe() is a bisect plus a few adds under a lock.
+    """
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    labels = _label_text(self.labelnames, key, [("le", _number(bound))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_text(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_number(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Gauge:
+    """
+    Read at scrape time from a callback, so nothing is paid on the request path.
+    """
+    def __init__(self, name, help_text, fn):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {_number(value)}"]
+
+class MetricsRegistry:
+    def __init__(self, enabled=True, prefix="ambedkargpt"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.metrics = {}
+
+        self.stage_seconds = self.histogram(
+            "stage_seconds", "Time spent in each pipeline stage.", labelnames=("stage",))
+        self.requests = self.counter(
+            "requests_total", "Answered requests by endpoint and outcome.", labelnames=("endpoint", "outcome"))
+        self.prompt_chars = self.histogram(
+            "prompt_chars", "Size of prompts sent to the LLM, in characters.", buckets=SIZE_BUCKETS)
+        self.candidates = self.histogram(
+            "candidates", "Candidates produced by each retrieval step.", buckets=COUNT_BUCKETS, labelnames=("stage",))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(f"{self.prefix}_{name}", help_text, labelnames))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, labelnames=()):
+        return self._register(Histogram(f"{self.prefix}_{name}", help_text, buckets, labelnames))
+
+    def gauge(self, name, help_text, fn):
+        return self._register(Gauge(f"{self.prefix}_{name}", help_text, fn))
+
+    @contextlib.contextmanager
+    def _timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - start, stage=stage)
+
+    def span(self, stage):
+        """
+        `with metrics.span("rerank"):` records the block's wall time under that stage.
+        A shared no-op when monitoring is off.
+        """
+        if not self.enabled:
+            return _NOOP
+        return self._timed(stage)
+
+    def observe(self, stage, seconds):
+        """
+        For durations that do not fit a with-block (e.g. time to first streamed token).
+        """
+        if self.enabled:
+            self.stage_seconds.observe(seconds, stage=stage)
+
+    def count_candidates(self, stage, n):
+        if self.enabled:
+            self.candidates.observe(n, stage=stage)
+
+    def record_prompt(self, prompt):
+        if self.enabled:
+            self.prompt_chars.observe(len(prompt))
+
+    def record_request(self, endpoint, outcome):
+        if self.enabled:
+            self.requests.inc(endpoint=endpoint, outcome=outcome)
+
+    def render(self):
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+_NOOP = contextlib.nullcontext()
+
+# Process-wide registry used by the pipeline and the API
+metrics = MetricsRegistry(enabled=config.get('monitoring', {}).get('enabled', True))
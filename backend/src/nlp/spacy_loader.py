@@ -0,0 +1,19 @@
+import threading
+
+# Loaded pipelines, keyed by (model name, disabled components)
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+def get_nlp(model_name="en_core_web_sm", disable=()):
+    """
+    Returns a shared spaCy pipeline, loading it on first use instead of at import time.
+    Components in `disable` are switched off, so callers only pay for what they read.
+    """
+    key = (model_name, tuple(sorted(disable)))
+    with _pipelines_lock:
+        if key not in _pipelines:
+            # Deferred: importing spaCy alone takes a noticeable fraction of a second
+            import spacy
+            print(f"Loading spaCy pipeline: {model_name} (disabled: {list(disable) or 'none'})...")
+            _pipelines[key] = spacy.load(model_name, disable=list(disable))
+        return _pipelines[key]
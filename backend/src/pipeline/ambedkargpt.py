@@ -7,42 +7,203 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(project_root)
 
+CONFIG_PATH = os.path.join(project_root, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+from src.embeddings.embedding_service import get_embedding_service, LazyEmbeddingService
+from src.cache.response_cache import ResponseCache
 from src.retrieval.local_search import LocalSearch
 from src.retrieval.global_search import GlobalSearch
 from src.retrieval.ranker import Ranker
+from src.embeddings.inference_backend import serving_backend
 from src.llm.answer_generator import AnswerGenerator
+from src.llm.llm_client import LLM_ERROR_MESSAGE
+from src.monitoring.metrics import metrics
+from src.pipeline.startup import StartupManager
+
+def sanitize_results(results):
+    """
+    CRITICAL FIX: Converts NumPy types (float32) to standard Python types (float)
+    so JSON serialization doesn't crash.
+    """
+    clean_results = []
+    for r in results:
+        # Create a copy to avoid modifying original data
+        item = r.copy()
+        if 'score' in item:
+            item['score'] = float(item['score']) # Convert numpy.float32 -> float
+        if 'embedding' in item:
+            del item['embedding'] # Remove heavy embeddings if present
+        clean_results.append(item)
+    return clean_results
+
+def build_context_payload(reranked_local, global_results, dynamic_graph):
+    # SANITIZE DATA BEFORE RETURNING (The Fix)
+    clean_local = sanitize_results(reranked_local[:3])
+    clean_global = sanitize_results(global_results[:2])
+    
+    top_score = clean_local[0]['score'] if clean_local else 0.0
+    
+    return {
+        "metrics": {
+            "confidence": float(top_score),
+            "source_count": len(clean_local) + len(clean_global),
+        },
+        "context": {
+            "local": clean_local,
+            "global": clean_global
+        },
+        "graph_data": dynamic_graph
+    }
 
 class AmbedkarGPT:
-    def __init__(self):
+    def __init__(self, background=False, warmup=None):
+        """
+        Components load concurrently (see load order below). With background=True this
+        returns at once and `ready` / `startup.status()` report progress; otherwise it
+        blocks until everything is loaded and raises if anything failed.
+        """
         print("\n=== Initializing AmbedkarGPT (SemRAG Architecture) ===")
-        self.local_search = LocalSearch()
-        self.global_search = GlobalSearch()
-        self.ranker = Ranker()
-        self.generator = AnswerGenerator()
-        print("=== System Ready ===\n")
+        model_name = config['chunking']['model_name']
+        backend = serving_backend()
+        if warmup is None:
+            warmup = config.get('server', {}).get('warmup', False)
+
+        # Until the model is up, the search engines get a handle that loads it on first use,
+        # so graph / chunk / embedding files load while torch is still importing
+        search_embedder = LazyEmbeddingService(model_name, backend)
+
+        self.startup = StartupManager(target=self)
+        self.startup.add("embedder", lambda: get_embedding_service(model_name, backend))
+        self.startup.add("local_search", lambda: LocalSearch(embedder=search_embedder))
+        self.startup.add("global_search", lambda: GlobalSearch(embedder=search_embedder))
+        self.startup.add("ranker", lambda: Ranker(backend=backend))
+        self.startup.add("generator", AnswerGenerator)
+        self.startup.add("response_cache", self.connect_components,
+                         deps=["embedder", "local_search", "global_search", "ranker", "generator"])
+        if warmup:
+            self.startup.add("warmup", self.warm_up, deps=["response_cache"])
+        self.startup.start()
+
+        if not background:
+            if not self.startup.wait():
+                raise RuntimeError(f"Startup failed: {self.startup.errors()}")
+            print(f"=== System Ready ({self.startup.status()['seconds']:.1f}s) ===\n")
+
+    @property
+    def ready(self):
+        return self.startup.ready
+
+    def connect_components(self):
+        """
+        Last startup step: wires the loaded components together and builds the answer cache.
+        """
+        # Shared with both search engines, so the query is only encoded once
+        self.local_search.embedder = self.embedder
+        self.global_search.embedder = self.embedder
+        self.ranker.set_corpus_version(self.local_search.chunks_version)
+
+        # Answer cache for repeated / near-duplicate questions, cleared when artifacts change
+        cache_cfg = config.get('cache', {})
+        response_cache = ResponseCache(
+            max_entries=cache_cfg.get('response_max_entries', 1024),
+            ttl_seconds=cache_cfg.get('response_ttl_seconds', 3600),
+            max_bytes=cache_cfg.get('response_max_mb', 64) * 1024 * 1024,
+            similarity=cache_cfg.get('response_similarity', 0.92),
+            artifact_paths=[
+                os.path.join(project_root, config['paths'][key])
+                for key in ['output_chunks', 'graph_path', 'summaries_path', 'entity_embeddings', 'summary_embeddings']
+            ] + [
+                os.path.join(project_root, config['paths']['graph_snapshot'], "meta.json"),
+                os.path.join(project_root, config['paths']['chunk_store'], "meta.json")
+            ]
+        )
+        self.response_cache = response_cache
+        self.register_gauges()
+        return response_cache
+
+    def warm_up(self, query="What did Dr. Ambedkar say about the annihilation of caste?"):
+        """
+        Runs one query through every retrieval stage (not the LLM), so the first real
+        request does not pay for lazy model init, kernel selection and first-touch page faults.
+        """
+        query_emb = self.embedder.encode_query(query)
+        local_results = self.local_search.search(query, top_k=self.ranker.first_stage_k, query_emb=query_emb)
+        self.global_search.search(query, query_emb=query_emb)
+        reranked = self.ranker.rerank(local_results, query)
+        self.local_search.subgraph_for_results(reranked[:3])
+        # The warm-up query's scores should not linger in the rerank cache
+        self.ranker.score_cache.clear()
+
+    def register_gauges(self):
+        """
+        Cache hit rates, read only when /metrics is scraped.
+        """
+        metrics.gauge("response_cache_hit_rate", "Share of questions answered from the response cache.",
+                      lambda: self.response_cache.stats()["hit_rate"])
+        metrics.gauge("response_cache_entries", "Answers held in the response cache.",
+                      lambda: self.response_cache.stats()["entries"])
+        metrics.gauge("rerank_cache_hit_rate", "Share of (query, chunk) pairs scored from the rerank cache.",
+                      lambda: self.ranker.cache_stats()["hit_rate"])
+        llm_cache = getattr(self.generator.llm, 'cache', None)
+        if llm_cache is not None:
+            metrics.gauge("llm_cache_hit_rate", "Share of prompts answered from the on-disk prompt cache.",
+                          lambda: llm_cache.hit_rate())
 
     def query(self, user_query):
         print(f"\nUser Query: {user_query}")
         print("-" * 30)
         
-        # 1. Retrieval
-        print("1. Retrieving Context...")
-        local_results = self.local_search.search(user_query)
-        global_results = self.global_search.search(user_query)
-        
-        # 2. Re-Ranking (The Missing Piece!)
-        print("2. Re-Ranking Results...")
-        local_results = self.ranker.rerank(local_results, user_query)
+        # 0. Cache (exact query first, then near-duplicate embedding)
+        query_emb = None
+        with metrics.span("cache_lookup"):
+            cached = self.response_cache.get_exact(user_query)
+        if cached is None:
+            with metrics.span("embed_query"):
+                query_emb = self.embedder.encode_query(user_query)
+            with metrics.span("cache_lookup"):
+                cached = self.response_cache.get_similar(query_emb)
         
-        # 3. Generation
-        print("3. Generating Response...")
-        response = self.generator.generate(user_query, local_results[:3], global_results[:2])
+        if cached is not None:
+            print("Served from cache.")
+            response = cached['answer']
+            metrics.record_request("query", "cached")
+        else:
+            # 1. Retrieval
+            print("1. Retrieving Context...")
+            with metrics.span("local_search"):
+                local_results = self.local_search.search(user_query, top_k=self.ranker.first_stage_k, query_emb=query_emb)
+            with metrics.span("global_search"):
+                global_results = self.global_search.search(user_query, query_emb=query_emb)
+            
+            # 2. Re-Ranking (The Missing Piece!)
+            print("2. Re-Ranking Results...")
+            with metrics.span("rerank"):
+                local_results = self.ranker.rerank(local_results, user_query)
+            
+            # 3. Generation
+            print("3. Generating Response...")
+            with metrics.span("generate"):
+                response = self.generator.generate(user_query, local_results[:3], global_results[:2])
+            if not response.startswith(LLM_ERROR_MESSAGE):
+                # Same entry shape as /chat, which returns cached entries as they are
+                with metrics.span("subgraph"):
+                    dynamic_graph = self.local_search.subgraph_for_results(local_results[:3])
+                self.response_cache.put(user_query, query_emb, {
+                    "answer": response,
+                    **build_context_payload(local_results, global_results, dynamic_graph)
+                })
+                metrics.record_request("query", "generated")
+            else:
+                metrics.record_request("query", "error")
         
         print("\n" + "="*30)
         print("FINAL ANSWER")
         print("="*30)
         print(response)
         print("="*30 + "\n")
+        return response
 
 if __name__ == "__main__":
     bot = AmbedkarGPT()
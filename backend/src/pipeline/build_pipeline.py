@@ -0,0 +1,168 @@
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import yaml
+
+# Path setup
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+CONFIG_PATH = os.path.join(project_root, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+from src.embeddings.embedding_store import file_hash, text_hash
+
+STAGES = ["chunk", "graph", "community", "summary"]
+
+def path_of(key):
+    return os.path.join(project_root, config['paths'][key])
+
+def chunk_store_meta():
+    return os.path.join(path_of('chunk_store'), "meta.json")
+
+def fingerprint(*parts):
+    """
+    Hash of a stage's inputs: upstream artifact hashes, config values and model names.
+    """
+    return text_hash(json.dumps(parts, sort_keys=True, default=str))
+
+class BuildPipeline:
+    """
+    Offline driver for chunk -> graph -> community -> summary.
+    Each stage is fingerprinted by the content of its inputs (recorded in the build manifest)
+    and skipped when nothing it depends on changed. Inside the stages that do run,
+    entity extraction and summaries are reused per chunk / per community content hash.
+    """
+    def __init__(self, force=()):
+        self.force = set(force)
+        self.manifest_path = path_of('build_manifest')
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+        self.builder = None
+
+    def save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_fresh(self, stage, stage_fingerprint, outputs):
+        entry = self.manifest.get(stage)
+        return (
+            stage not in self.force
+            and entry is not None
+            and entry["fingerprint"] == stage_fingerprint
+            and all(os.path.exists(p) for p in outputs)
+        )
+
+    def run_stage(self, stage, stage_fingerprint, outputs, build_fn):
+        """
+        Runs build_fn unless the stage is fresh. Returns True if it ran.
+        """
+        if self.is_fresh(stage, stage_fingerprint, outputs):
+            print(f"[{stage}] up to date, skipping.")
+            return False
+
+        print(f"[{stage}] inputs changed, rebuilding...")
+        start = time.perf_counter()
+        build_fn()
+        # Recorded only after a successful build, so a crash re-runs the stage next time
+        self.manifest[stage] = {
+            "fingerprint": stage_fingerprint,
+            "seconds": round(time.perf_counter() - start, 2),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.save_manifest()
+        return True
+
+    # --- Stage inputs ---
+
+    def chunk_fingerprint(self):
+        chunk_cfg = config['chunking']
+        # Worker / batch settings change speed, not output, so they are left out
+        return fingerprint(
+            file_hash(path_of('pdf_path')),
+            chunk_cfg['model_name'],
+            chunk_cfg['chunk_size_tokens'],
+            chunk_cfg['similarity_threshold'],
+        )
+
+    def graph_fingerprint(self):
+        from src.graph.entity_extractor import EntityExtractor
+        return fingerprint(
+            file_hash(chunk_store_meta()),
+            EntityExtractor.model_name,
+            config['chunking']['model_name'],
+        )
+
+    def community_fingerprint(self):
+        snapshot_meta = os.path.join(path_of('graph_snapshot'), "meta.json")
+        return fingerprint(file_hash(snapshot_meta), config['graph'].get('louvain_seed'))
+
+    def summary_fingerprint(self):
+        return fingerprint(
+            file_hash(path_of('community_path')),
+            file_hash(chunk_store_meta()),
+            config['llm']['model_name'],
+            config['llm']['temperature'],
+            config['chunking']['model_name'],
+        )
+
+    # --- Stage bodies ---
+
+    def get_builder(self):
+        if self.builder is None:
+            from src.graph.graph_builder import GraphBuilder
+            self.builder = GraphBuilder()
+        return self.builder
+
+    def build_chunks(self):
+        from src.chunking.semantic_chunker import SemanticChunker
+        SemanticChunker().chunk_data()
+
+    def build_graph(self):
+        builder = self.get_builder()
+        builder.build_graph()
+        builder.save_entity_embeddings()
+
+    def build_communities(self):
+        builder = self.get_builder()
+        if builder.graph.number_of_nodes() == 0:
+            # Graph stage was skipped this run; reuse the graph it saved
+            with open(os.path.join(project_root, "processed", "knowledge_graph.pkl"), 'rb') as f:
+                builder.graph = pickle.load(f)
+        builder.run_community_detection()
+
+    def build_summaries(self):
+        from src.graph.summarizer import CommunitySummarizer
+        CommunitySummarizer().generate_summaries()
+
+    def run(self):
+        # Each fingerprint is computed only after the previous stage has (maybe) rewritten its inputs
+        self.run_stage("chunk", self.chunk_fingerprint(),
+                       [chunk_store_meta()], self.build_chunks)
+        self.run_stage("graph", self.graph_fingerprint(),
+                       [path_of('graph_path'), path_of('entity_embeddings'),
+                        os.path.join(path_of('graph_snapshot'), "meta.json")],
+                       self.build_graph)
+        self.run_stage("community", self.community_fingerprint(),
+                       [path_of('community_path')], self.build_communities)
+        self.run_stage("summary", self.summary_fingerprint(),
+                       [path_of('summaries_path'), path_of('summary_embeddings')],
+                       self.build_summaries)
+        print("Build complete.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental offline build: chunk -> graph -> community -> summary")
+    parser.add_argument("--force", nargs="*", choices=STAGES, default=None,
+                        help="stages to rebuild even if their inputs are unchanged (no names = all)")
+    args = parser.parse_args()
+    force = STAGES if args.force == [] else (args.force or [])
+    BuildPipeline(force=force).run()
@@ -0,0 +1,117 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+class Component:
+    def __init__(self, name, load_fn, deps=()):
+        self.name = name
+        self.load_fn = load_fn
+        self.deps = tuple(deps)
+        self.state = PENDING
+        self.seconds = None
+        self.error = None
+        self.future = None
+
+    def status(self):
+        return {
+            "state": self.state,
+            "seconds": None if self.seconds is None else round(self.seconds, 3),
+            "error": self.error,
+        }
+
+class StartupManager:
+    """
+    Loads named components on a thread pool, each as soon as its dependencies are ready.
+    Model loads are mostly torch / file I/O time, which releases the GIL, so independent
+    components really do overlap. A component's result is set on `target` under its name.
+    """
+    def __init__(self, target=None):
+        self.target = target
+        self.components = {}
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add(self, name, load_fn, deps=()):
+        # Dependencies must be added first, so their futures exist once loading starts
+        for dep in deps:
+            if dep not in self.components:
+                raise ValueError(f"Component {name} depends on unknown component {dep}")
+        self.components[name] = Component(name, load_fn, deps)
+
+    def start(self):
+        self.started = time.perf_counter()
+        # One thread per component: waiting on a dependency must never hold up an independent load
+        executor = ThreadPoolExecutor(max_workers=max(len(self.components), 1), thread_name_prefix="startup")
+        for component in self.components.values():
+            component.future = executor.submit(self._load, component)
+        executor.shutdown(wait=False)
+        return self
+
+    def _load(self, component):
+        for dep in component.deps:
+            try:
+                self.components[dep].future.result()
+            except Exception:
+                component.state = FAILED
+                component.error = f"dependency {dep} failed"
+                self._check_finished()
+                raise
+
+        component.state = LOADING
+        start = time.perf_counter()
+        try:
+            result = component.load_fn()
+            if self.target is not None and result is not None:
+                setattr(self.target, component.name, result)
+        except Exception as e:
+            component.seconds = time.perf_counter() - start
+            component.state = FAILED
+            component.error = f"{type(e).__name__}: {e}"
+            print(f"❌ {component.name} failed after {component.seconds:.2f}s: {component.error}")
+            self._check_finished()
+            raise
+        component.seconds = time.perf_counter() - start
+        component.state = READY
+        print(f"✅ {component.name} ready in {component.seconds:.2f}s")
+        self._check_finished()
+        return result
+
+    def _check_finished(self):
+        with self._lock:
+            if self.finished is None and all(c.state in (READY, FAILED) for c in self.components.values()):
+                self.finished = time.perf_counter()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until every component has loaded or failed; returns True if all are ready.
+        """
+        wait([c.future for c in self.components.values()], timeout=timeout)
+        return self.ready
+
+    @property
+    def ready(self):
+        return self.started is not None and all(c.state == READY for c in self.components.values())
+
+    @property
+    def failed(self):
+        return any(c.state == FAILED for c in self.components.values())
+
+    def errors(self):
+        return {name: c.error for name, c in self.components.items() if c.state == FAILED}
+
+    def status(self):
+        """
+        Per-component load state and timing, as reported by /readyz.
+        """
+        if self.started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished or time.perf_counter()) - self.started
+        return {
+            "ready": self.ready,
+            "seconds": round(elapsed, 3),
+            "components": {name: c.status() for name, c in self.components.items()},
+        }
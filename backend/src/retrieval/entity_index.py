@@ -0,0 +1,153 @@
+import os
+import time
+import yaml
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    # Zero vectors stay zero (cosine 0), same as sklearn's cosine_similarity
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+def _select(ids, scores, top_k, threshold):
+    """
+    Keeps scores > threshold, then the top_k best (all of them if top_k is None), sorted descending.
+    """
+    if threshold is not None:
+        keep = scores > threshold
+        ids, scores = ids[keep], scores[keep]
+    if top_k is not None and len(scores) > top_k:
+        part = np.argpartition(-scores, top_k - 1)[:top_k]
+        ids, scores = ids[part], scores[part]
+    order = np.argsort(-scores, kind='stable')
+    return ids[order], scores[order]
+
+class ExactIndex:
+    """
+    Brute-force cosine search over every entity. The reference for recall checks.
+    """
+    def __init__(self, embeddings):
+        self.vectors = _normalize(embeddings)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, query_emb, top_k=10, threshold=None):
+        """
+        Returns (entity ids, cosine scores) sorted by score, highest first.
+        """
+        query = _normalize(np.reshape(query_emb, -1))
+        scores = self.vectors @ query
+        return _select(np.arange(len(scores)), scores, top_k, threshold)
+
+class IVFIndex:
+    """
+    Inverted-file index: spherical k-means partitions the entities into nlist cells,
+    and a query only scans the nprobe cells whose centroids are closest to it.
+    """
+    def __init__(self, embeddings, nlist=None, nprobe=8, n_iter=10, seed=0):
+        self.vectors = _normalize(embeddings)
+        n = len(self.vectors)
+        self.nlist = max(1, min(n, nlist or int(np.sqrt(n))))
+        self.nprobe = min(nprobe, self.nlist)
+
+        rng = np.random.default_rng(seed)
+        self.centroids = self._train(rng, n_iter)
+
+        # Inverted lists stored CSR-style: entity ids grouped by cell
+        assignment = self._assign(self.vectors)
+        self.list_ids = np.argsort(assignment, kind='stable')
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=self.nlist))])
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _assign(self, vectors, batch_size=65536):
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), batch_size):
+            block = vectors[start:start + batch_size]
+            assignment[start:start + batch_size] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignment
+
+    def _train(self, rng, n_iter):
+        # Train on a sample; ~64 points per cell is enough for coarse cells
+        n = len(self.vectors)
+        sample_size = min(n, 64 * self.nlist)
+        sample = self.vectors[rng.choice(n, sample_size, replace=False)]
+        self.centroids = sample[rng.choice(sample_size, self.nlist, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignment = np.argmax(sample @ self.centroids.T, axis=1)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=self.nlist)
+            # Re-seed empty cells with random sample points
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            self.centroids = _normalize(sums)
+        return self.centroids
+
+    def search(self, query_emb, top_k=10, threshold=None):
+        """
+        Same contract as ExactIndex.search, but only scans the nprobe nearest cells.
+        """
+        query = _normalize(np.reshape(query_emb, -1))
+        cell_scores = self.centroids @ query
+        cells = np.argpartition(-cell_scores, self.nprobe - 1)[:self.nprobe]
+
+        candidates = np.concatenate([
+            self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in cells
+        ])
+        scores = self.vectors[candidates] @ query
+        return _select(candidates, scores, top_k, threshold)
+
+def build_entity_index(embeddings, kind=None):
+    """
+    Builds the entity index selected in config.yaml (retrieval.entity_index).
+    """
+    retrieval_cfg = config.get('retrieval', {})
+    kind = kind or retrieval_cfg.get('entity_index', 'exact')
+    if kind == 'exact':
+        return ExactIndex(embeddings)
+    if kind == 'ivf':
+        return IVFIndex(
+            embeddings,
+            nlist=retrieval_cfg.get('ivf_nlist'),
+            nprobe=retrieval_cfg.get('ivf_nprobe', 8)
+        )
+    raise ValueError(f"Unknown entity index: {kind}")
+
+def recall_at_k(index, exact, queries, top_k=10, threshold=None):
+    """
+    Mean fraction of the exact top-k (above threshold) that the approximate index also returns.
+    """
+    recalls = []
+    for query in queries:
+        truth, _ = exact.search(query, top_k=top_k, threshold=threshold)
+        if len(truth) == 0:
+            continue
+        found, _ = index.search(query, top_k=top_k, threshold=threshold)
+        recalls.append(len(set(truth.tolist()) & set(found.tolist())) / len(truth))
+    return float(np.mean(recalls)) if recalls else 1.0
+
+if __name__ == "__main__":
+    # Recall-vs-exact check on the persisted entity embeddings
+    emb_path = os.path.join(BASE_DIR, config['paths']['entity_embeddings'])
+    embeddings = np.load(emb_path, mmap_mode='r')
+    rng = np.random.default_rng(0)
+    queries = embeddings[rng.choice(len(embeddings), min(200, len(embeddings)), replace=False)]
+    queries = queries + rng.normal(scale=0.05, size=queries.shape)
+
+    exact = ExactIndex(embeddings)
+    ivf = build_entity_index(embeddings, kind='ivf')
+    for name, index in [("exact", exact), ("ivf", ivf)]:
+        start = time.perf_counter()
+        for q in queries:
+            index.search(q, top_k=10, threshold=0.3)
+        per_query = (time.perf_counter() - start) / len(queries) * 1000
+        print(f"{name:5s}: {per_query:.3f} ms/query, recall@10 = {recall_at_k(index, exact, queries, 10, 0.3):.3f}")
@@ -0,0 +1,93 @@
+from collections import deque
+
+class EntityMatcher:
+    """
+    Aho-Corasick automaton over lower-cased entity names.
+    Built once, then finds every entity occurring in a text in a single pass,
+    with the same substring semantics as `name.lower() in text.lower()`.
+    """
+    def __init__(self, names):
+        self.names = list(names)
+        # State 0 is the root; each state has transitions, a failure link,
+        # the pattern ending there (or -1) and a link to the next terminal state on its failure chain
+        self.goto = [{}]
+        self.pattern = [-1]
+        self.fail = [0]
+        self.output_link = [-1]
+
+        for pattern_id, name in enumerate(self.names):
+            self._insert(name.lower(), pattern_id)
+        self._build_links()
+
+    def _insert(self, word, pattern_id):
+        if not word:
+            return
+        state = 0
+        for ch in word:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.pattern.append(-1)
+                self.fail.append(0)
+                self.output_link.append(-1)
+            state = nxt
+        # Duplicate names after lower-casing keep the first id; find() expands them below
+        if self.pattern[state] == -1:
+            self.pattern[state] = pattern_id
+
+    def _build_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                failed = self.fail[nxt]
+                self.output_link[nxt] = failed if self.pattern[failed] != -1 else self.output_link[failed]
+
+        # Names that collapse to the same lower-cased string all match together
+        self.aliases = {}
+        first_id = {}
+        for pattern_id, name in enumerate(self.names):
+            key = name.lower()
+            if key in first_id:
+                self.aliases.setdefault(first_id[key], []).append(pattern_id)
+            else:
+                first_id[key] = pattern_id
+
+    def find_ids(self, text):
+        """
+        Returns the ids (positions in names) of every entity occurring in text, sorted.
+        """
+        goto, fail, pattern, output_link = self.goto, self.fail, self.pattern, self.output_link
+        found_states = set()
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            # Walk terminal states on the failure chain; stop at one already reported,
+            # since everything further down its chain was reported with it
+            s = state if pattern[state] != -1 else output_link[state]
+            while s > 0 and s not in found_states:
+                found_states.add(s)
+                s = output_link[s]
+
+        ids = []
+        for s in found_states:
+            ids.append(pattern[s])
+            ids.extend(self.aliases.get(pattern[s], []))
+        return sorted(ids)
+
+    def find(self, text):
+        """
+        Returns the names of every entity occurring in text, in input order.
+        """
+        return [self.names[i] for i in self.find_ids(text)]
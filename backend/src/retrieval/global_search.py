@@ -2,8 +2,9 @@ import os
 import json
 import yaml
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
+from src.embeddings.embedding_service import get_embedding_service, LazyEmbeddingService
+from src.embeddings.embedding_store import load_or_encode
 
 # Load Config
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,27 +13,43 @@ with open(CONFIG_PATH, "r") as f:
     config = yaml.safe_load(f)
 
 class GlobalSearch:
-    def __init__(self):
+    def __init__(self, embedder=None, summaries=None, comm_embeddings=None):
+        """
+        Defaults to the built summaries; pass embedder / summaries ({community id: text}) /
+        comm_embeddings to run on an in-memory corpus instead.
+        """
         print("Initializing Global Search Engine...")
-        self.model = SentenceTransformer(config['chunking']['model_name'])
+        self.embedder = embedder or get_embedding_service(config['chunking']['model_name'])
         
         # Load Community Summaries
-        comm_path = os.path.join(BASE_DIR, "processed", "community_summaries.json")
-        
-        if not os.path.exists(comm_path):
-            raise FileNotFoundError("Community summaries not found! Run summarizer.py first.")
-            
-        with open(comm_path, 'r') as f:
-            self.summaries = json.load(f)
+        comm_path = os.path.join(BASE_DIR, config['paths']['summaries_path'])
+        if summaries is None:
+            if not os.path.exists(comm_path):
+                raise FileNotFoundError("Community summaries not found! Run summarizer.py first.")
+                
+            with open(comm_path, 'r') as f:
+                summaries = json.load(f)
+        self.summaries = summaries
             
         # Prepare Data for Search
         self.comm_ids = list(self.summaries.keys())
         self.comm_texts = list(self.summaries.values())
         
-        print(f"Encoding {len(self.comm_texts)} community summaries...")
-        self.comm_embeddings = self.model.encode(self.comm_texts)
+        # Persisted by the summarizer, re-encoded only if summaries or model changed
+        if comm_embeddings is None:
+            print(f"Loading embeddings for {len(self.comm_texts)} community summaries...")
+            comm_embeddings = load_or_encode(
+                os.path.join(BASE_DIR, config['paths']['summary_embeddings']),
+                config['chunking']['model_name'],
+                comm_path,
+                self.comm_texts,
+                # fp32 reference model, never the (possibly quantized) serving embedder:
+                # the stored matrix is keyed by model name only and reused by builds
+                LazyEmbeddingService(config['chunking']['model_name']).encode
+            )
+        self.comm_embeddings = comm_embeddings
 
-    def search(self, query, top_k=3):
+    def search(self, query, top_k=3, query_emb=None):
         """
         Implements SemRAG Equation 5:
         Search against community summaries to find broad contexts.
@@ -40,8 +57,9 @@ class GlobalSearch:
         if not self.comm_embeddings.any():
             return []
 
-        # 1. Embed Query
-        query_emb = self.model.encode([query])
+        # 1. Embed Query (skipped if the caller already encoded it)
+        if query_emb is None:
+            query_emb = self.embedder.encode_query(query)
         
         # 2. Calculate Similarity
         sim_scores = cosine_similarity(query_emb, self.comm_embeddings)[0]
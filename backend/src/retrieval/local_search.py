@@ -1,10 +1,13 @@
 import os
-import json
 import yaml
-import networkx as nx
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from src.embeddings.embedding_service import get_embedding_service, LazyEmbeddingService
+from src.embeddings.embedding_store import load_or_encode
+from src.chunking.chunk_store import ChunkStore, load_chunk_store
+from src.graph.graph_snapshot import load_graph_view
+from src.retrieval.entity_index import build_entity_index
+from src.retrieval.entity_matcher import EntityMatcher
+from src.monitoring.metrics import metrics
 
 # Load Config
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,73 +16,140 @@ with open(CONFIG_PATH, "r") as f:
     config = yaml.safe_load(f)
 
 class LocalSearch:
-    def __init__(self):
+    def __init__(self, embedder=None, graph=None, chunks=None, entity_embeddings=None):
+        """
+        Everything defaults to the built artifacts; pass embedder / graph (GraphView) /
+        chunks (list of chunk dicts) / entity_embeddings to run on an in-memory corpus instead.
+        """
         print("Initializing Local Search Engine...")
-        # Load Embedding Model
-        self.model = SentenceTransformer(config['chunking']['model_name'])
+        # Shared Embedding Model (loaded once per process)
+        self.embedder = embedder or get_embedding_service(config['chunking']['model_name'])
         
-        # Load Graph
-        graph_path = os.path.join(BASE_DIR, config['paths']['graph_path'])
-        print(f"Loading Graph from {graph_path}...")
-        self.graph = nx.read_gml(graph_path)
+        # Load Graph (read-only CSR view, memory-mapped from the binary snapshot)
+        self.graph = graph if graph is not None else load_graph_view()
         
-        # Load Chunks (for text content)
-        chunks_path = os.path.join(BASE_DIR, config['paths']['output_chunks'])
-        with open(chunks_path, 'r') as f:
-            self.chunks_map = {f"CHUNK_{c['id']}": c for c in json.load(f)}
+        # Chunk texts, memory-mapped from the columnar store (embeddings are not needed here)
+        self.chunk_store = load_chunk_store() if chunks is None else ChunkStore.from_chunks(chunks)
+        # Identifies this chunk set (rerank scores are cached per version)
+        self.chunks_version = self.chunk_store.version
 
         # Cache Entity Embeddings to speed up search
-        self.entity_nodes = [n for n, attr in self.graph.nodes(data=True) if attr.get('type') == 'entity']
-        print(f"Caching embeddings for {len(self.entity_nodes)} entities...")
-        self.entity_embeddings = self.model.encode(self.entity_nodes)
+        # (persisted by the graph builder, re-encoded only if the graph or model changed)
+        self.entity_nodes = self.graph.nodes_of_type('entity')
+        if entity_embeddings is None:
+            print(f"Caching embeddings for {len(self.entity_nodes)} entities...")
+            entity_embeddings = load_or_encode(
+                os.path.join(BASE_DIR, config['paths']['entity_embeddings']),
+                config['chunking']['model_name'],
+                self.graph.source_path,
+                self.entity_nodes,
+                # fp32 reference model, never the (possibly quantized) serving embedder:
+                # the stored matrix is keyed by model name only and reused by builds
+                LazyEmbeddingService(config['chunking']['model_name']).encode
+            )
+        self.entity_embeddings = entity_embeddings
+        # Exact (brute-force) or approximate index, selected in config.yaml
+        self.entity_index = build_entity_index(self.entity_embeddings)
+
+        # Precompute the bipartite entity -> chunk incidence (rows: entity_nodes, cols: chunk_nodes)
+        # so scoring chunks is a sparse product instead of a per-request graph walk
+        self.chunk_nodes = self.graph.nodes_of_type('chunk')
+        # Row in the chunk store for each chunk column ("CHUNK_12" -> row of id 12)
+        self.chunk_rows = np.array(
+            [self.chunk_store.row_of(int(node.split("_", 1)[1])) for node in self.chunk_nodes],
+            dtype=np.int64
+        )
+        self.entity_chunk = self.graph.incidence_matrix('entity', 'chunk')
+        # How many top entities feed chunk scoring (None = every entity above threshold)
+        self.entity_fanout = config.get('retrieval', {}).get('entity_fanout', 10)
 
-    def search(self, query, top_k=5, threshold=0.3):
+        # Aho-Corasick automaton over entity names, for matching entities in retrieved text
+        self.entity_matcher = EntityMatcher(self.entity_nodes)
+
+    def search(self, query, top_k=5, threshold=0.3, query_emb=None):
         """
         Implements Equation 4: Local Search
-        1. Embed Query
+        1. Embed Query (skipped if the caller already encoded it)
         2. Find similar Entities (sim(v, Q) > threshold)
         3. Retrieve Chunks linked to those Entities
         """
         # 1. Embed Query
-        query_emb = self.model.encode([query])
-        
-        # 2. Calculate Similarity with all Entities
-        sim_scores = cosine_similarity(query_emb, self.entity_embeddings)[0]
+        if query_emb is None:
+            query_emb = self.embedder.encode_query(query)
         
-        # Filter entities by threshold
-        relevant_entities = []
-        for idx, score in enumerate(sim_scores):
-            if score > threshold:
-                relevant_entities.append((self.entity_nodes[idx], score))
-        
-        # Sort by score
-        relevant_entities = sorted(relevant_entities, key=lambda x: x[1], reverse=True)
+        # 2. Find Entities above threshold (already sorted by score)
+        entity_ids, entity_scores = self.entity_index.search(query_emb, top_k=self.entity_fanout, threshold=threshold)
+        metrics.count_candidates("entities", len(entity_ids))
+        if len(entity_ids) == 0:
+            return []
         
         # 3. Find Linked Chunks
         # The equation says: Retrieve chunks (g) connected to relevant entities (v)
-        retrieved_chunks = {}
+        # Column c of `links` marks which relevant entities touch chunk c (rows keep score order)
+        links = self.entity_chunk[entity_ids].tocsc()
+        links.sort_indices()
+        
+        # Entities per chunk: one sparse mat-vec
+        hits = links.T @ np.ones(len(entity_ids), dtype=np.float32)
+        chunk_cols = np.flatnonzero(hits)
+        metrics.count_candidates("chunks", len(chunk_cols))
         
-        for entity, score in relevant_entities[:10]: # Check top 10 entities
-            # Get neighbors in the graph
-            neighbors = self.graph.neighbors(entity)
-            for neighbor in neighbors:
-                # We only want neighbors that are CHUNKS
-                if neighbor.startswith("CHUNK_"):
-                    if neighbor not in retrieved_chunks:
-                        retrieved_chunks[neighbor] = {
-                            "text": self.chunks_map[neighbor]['text'],
-                            "score": score,  # Inherit score from the entity
-                            "source_entity": entity
-                        }
-                    else:
-                        # If chunk already found via another entity, boost score slightly
-                        retrieved_chunks[neighbor]['score'] += 0.1
+        # A chunk inherits the score of its best entity (first row, since rows are sorted by score)
+        # and is boosted slightly for every other relevant entity that links to it
+        best_rows = links.indices[links.indptr[chunk_cols]]
+        chunk_scores = entity_scores[best_rows] + 0.1 * (hits[chunk_cols] - 1)
 
-        # Convert to list and sort
-        results = list(retrieved_chunks.values())
-        results = sorted(results, key=lambda x: x['score'], reverse=True)
+        # Keep only the top_k chunks (plus anything tied with the last one), then build result dicts for those
+        if len(chunk_scores) > top_k:
+            cutoff = -np.partition(-chunk_scores, top_k - 1)[top_k - 1]
+            keep = np.flatnonzero(chunk_scores >= cutoff)
+            chunk_cols, chunk_scores, best_rows = chunk_cols[keep], chunk_scores[keep], best_rows[keep]
+        # Ties go in the order a neighbour walk finds chunks: by best entity, then graph order
+        order = np.lexsort((chunk_cols, best_rows, -chunk_scores))[:top_k]
+        dense_scores = self.dense_scores(query_emb, self.chunk_rows[chunk_cols])
+        
+        results = []
+        for i in order:
+            chunk_node = self.chunk_nodes[chunk_cols[i]]
+            result = {
+                "chunk_id": chunk_node,
+                "text": self.chunk_store.text_at(self.chunk_rows[chunk_cols[i]]),
+                "score": chunk_scores[i],
+                "source_entity": self.entity_nodes[entity_ids[best_rows[i]]]
+            }
+            if dense_scores is not None:
+                result["dense_score"] = float(dense_scores[i])
+            results.append(result)
+        
+        return results
+
+    def dense_scores(self, query_emb, rows):
+        """
+        Bi-encoder cosine between the query and the stored chunk embeddings at `rows`
+        (the ranker's cheap first stage). None if the store holds no embeddings.
+        """
+        embeddings = self.chunk_store.embeddings
+        query = np.asarray(query_emb, dtype=np.float32).reshape(-1)
+        if embeddings.shape[1] != len(query):
+            return None
+        chunk_embs = np.asarray(embeddings[rows], dtype=np.float32)
+        norms = np.linalg.norm(chunk_embs, axis=1) * np.linalg.norm(query)
+        return chunk_embs @ query / np.maximum(norms, 1e-12)
+
+    def subgraph_for_results(self, results, max_nodes=20):
+        """
+        Graph neighbourhood shown next to an answer: the best-connected entities
+        mentioned in the retrieved text, in node-link format.
+        """
+        retrieved_text = " ".join([r['text'] for r in results])
+        
+        # Single pass over the text, independent of graph size
+        matched_entities = self.entity_matcher.find(retrieved_text)
+        
+        # Keep the best-connected matches
+        relevant_nodes = self.graph.top_degree_nodes(max_nodes, candidates=matched_entities)
         
-        return results[:top_k]
+        return self.graph.subgraph_data(relevant_nodes)
 
 if __name__ == "__main__":
     # Test it immediately
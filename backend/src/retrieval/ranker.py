@@ -1,33 +1,180 @@
-from sentence_transformers import CrossEncoder
+import os
+import re
+import copy
+import hashlib
+import threading
+import yaml
 import numpy as np
+from src.cache.lru_cache import LRUCache, normalize_query
+from src.embeddings.batch_scheduler import MicroBatcher
+from src.monitoring.metrics import metrics
+from src.embeddings.inference_backend import CROSS_ENCODER_NAME, load_cross_encoder, serving_backend
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CONFIG_PATH = os.path.join(BASE_DIR, "config.yaml")
+with open(CONFIG_PATH, "r") as f:
+    config = yaml.safe_load(f)
 
 class Ranker:
-    def __init__(self):
+    def __init__(self, model=None, backend=None):
         # This model is optimized for ranking search results
         # It's small, fast, and runs locally.
-        print("Loading Cross-Encoder for Advanced Re-Ranking...")
-        self.model = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
+        # (any object with a CrossEncoder-style predict() can be injected instead)
+        injected = model is not None
+        if model is None:
+            # fp32 torch, int8-quantized torch or ONNX Runtime, per config.yaml
+            backend = backend or serving_backend()
+            print(f"Loading Cross-Encoder for Advanced Re-Ranking ({backend})...")
+            model = load_cross_encoder(CROSS_ENCODER_NAME, backend)
+        self.model = model
+
+        # Rerank pairs from concurrent requests share cross-encoder forward passes
+        # (only for the real model; an injected one is called directly)
+        batching = config.get('batching', {})
+        self.predict = self.model.predict
+        if batching.get('enabled', False) and not injected:
+            self.predict = MicroBatcher(
+                self.model.predict,
+                max_batch_size=batching.get('max_batch_size', 32),
+                max_wait_ms=batching.get('max_wait_ms', 2),
+                name="cross-encoder"
+            )
+
+        # Cascade settings: how many candidates reach the cross-encoder, in what size windows
+        rerank_cfg = config.get('rerank', {})
+        self.first_stage_k = rerank_cfg.get('first_stage_k', 20)
+        self.top_n = rerank_cfg.get('cross_encoder_top_n', 8)
+        # Window sizes count the cross-encoder's own wordpieces (whitespace words for a model without a tokenizer)
+        self.window_tokens = rerank_cfg.get('window_tokens', 448)
+        self.window_overlap = rerank_cfg.get('window_overlap', 32)
+        # A private copy: fast tokenizers keep truncation state, which predict() sets on the model's own
+        self.tokenizer = copy.deepcopy(getattr(self.model, 'tokenizer', None))
+        self.tokenizer_lock = threading.Lock()
+        # None = sized from the candidates' windows (see pair_budget)
+        self.max_pairs = rerank_cfg.get('max_pairs')
+        self.early_exit_margin = rerank_cfg.get('early_exit_margin', 3.0)
+
+        # Cross-encoder scores keyed by (normalized query, chunk id, window position)
+        self.score_cache = LRUCache(max_entries=config.get('cache', {}).get('rerank_max_entries', 20000))
+        self.corpus_version = None
+
+    def set_corpus_version(self, version):
+        """
+        Cached scores are only valid for one chunk set; drop them when it changes.
+        """
+        if version != self.corpus_version:
+            self.score_cache.clear()
+            self.corpus_version = version
+
+    def cache_stats(self):
+        return self.score_cache.stats()
+
+    @staticmethod
+    def chunk_key(result):
+        # Stable identifier for a chunk; fall back to a hash of its text
+        if 'chunk_id' in result:
+            return result['chunk_id']
+        if 'id' in result:
+            return result['id']
+        return hashlib.sha1(result['text'].encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def first_stage_score(result):
+        # Bi-encoder similarity from local search; the graph score if the chunk store has no embeddings
+        return result.get('dense_score', result.get('score', 0.0))
+
+    def token_spans(self, text):
+        """
+        (start, end) character offsets of each token the cross-encoder will see in text.
+        """
+        if self.tokenizer is not None and getattr(self.tokenizer, 'is_fast', False):
+            with self.tokenizer_lock:
+                # Whole chunks are longer than the model limit by design; no overflow warning
+                encoded = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+            return encoded["offset_mapping"]
+        return [match.span() for match in re.finditer(r"\S+", text)]
+
+    def passage_windows(self, text):
+        """
+        Splits a chunk into overlapping windows of at most window_tokens wordpieces, so the
+        tail of a long chunk is scored instead of silently truncated by the cross-encoder.
+        """
+        spans = self.token_spans(text)
+        if len(spans) <= self.window_tokens:
+            return [text]
+        starts = range(0, len(spans) - self.window_overlap, self.window_tokens - self.window_overlap)
+        return [text[spans[i][0]:spans[min(i + self.window_tokens, len(spans)) - 1][1]] for i in starts]
+
+    def pair_budget(self, window_counts, top_k):
+        """
+        Default cap on (query, window) pairs: every window of the top_k candidates with
+        the most windows, plus one window for each remaining candidate.
+        """
+        if self.max_pairs:
+            return self.max_pairs
+        counts = sorted(window_counts, reverse=True)
+        return sum(counts[:top_k]) + max(len(counts) - top_k, 0)
 
     def rerank(self, results, query, top_k=5):
         """
-        Re-ranks results using a Cross-Encoder model.
+        Cascaded re-ranking:
+        1. Keep the top_n results by bi-encoder similarity (no model call).
+        2. Score their passage windows with the Cross-Encoder, one window per chunk per round;
+           a chunk's score is its best window.
+        3. After each round, stop scoring chunks that trail the top_k cut by early_exit_margin.
+        At most pair_budget() (query, window) pairs reach the model; cached window scores are free.
         """
         if not results:
             return []
 
-        # Prepare pairs for the model: [[Query, Text1], [Query, Text2], ...]
-        passages = [res['text'] for res in results]
-        model_inputs = [[query, passage] for passage in passages]
-        
-        # Predict scores
-        scores = self.model.predict(model_inputs)
-        
-        # Attach scores back to results
-        for idx, score in enumerate(scores):
-            results[idx]['rerank_score'] = float(score)
+        # 1. Cheap first stage
+        candidates = sorted(results, key=self.first_stage_score, reverse=True)[:max(self.top_n, top_k)]
+        metrics.count_candidates("rerank", len(candidates))
+
+        query_key = normalize_query(query)
+        windows = [self.passage_windows(res['text']) for res in candidates]
+        chunk_keys = [self.chunk_key(res) for res in candidates]
+        best = [None] * len(candidates)
+        active = list(range(len(candidates)))
+        budget = self.pair_budget([len(w) for w in windows], top_k)
+
+        # 2. Rounds over window positions
+        for position in range(max(len(w) for w in windows)):
+            active = [idx for idx in active if position < len(windows[idx])]
+            keys = [(query_key, chunk_keys[idx], position) for idx in active]
+            scores = [self.score_cache.get(key) for key in keys]
+            missing = [i for i, score in enumerate(scores) if score is None]
+            # Over budget: score the most promising chunks first, drop the rest
+            if len(missing) > budget:
+                missing = sorted(missing, key=lambda i: (best[active[i]] is None, -(best[active[i]] or 0.0)))[:budget]
+            
+            if missing:
+                # Prepare pairs for the model: [[Query, Window1], [Query, Window2], ...]
+                model_inputs = [[query, windows[active[i]][position]] for i in missing]
+                predicted = self.predict(model_inputs)
+                budget -= len(missing)
+                for i, score in zip(missing, predicted):
+                    scores[i] = float(score)
+                    self.score_cache.put(keys[i], scores[i])
+
+            for idx, score in zip(active, scores):
+                if score is not None and (best[idx] is None or score > best[idx]):
+                    best[idx] = score
+
+            # 3. Early exit for chunks that can no longer realistically reach the top_k
+            scored = sorted((b for b in best if b is not None), reverse=True)
+            if len(scored) > top_k:
+                cut = scored[top_k - 1] - self.early_exit_margin
+                active = [idx for idx in active if best[idx] is not None and best[idx] >= cut]
+            if budget <= 0 or not active:
+                break
+
+        # Attach scores back to results (None if the budget ran out before the chunk was reached)
+        for idx, res in enumerate(candidates):
+            res['rerank_score'] = best[idx]
             
-        # Sort by the new Cross-Encoder score (Descending)
+        # Sort by the new Cross-Encoder score (Descending), unscored chunks last in first-stage order
         # We assume cross-encoder score is more accurate than vector score
-        ranked_results = sorted(results, key=lambda x: x['rerank_score'], reverse=True)
+        ranked_results = sorted(candidates, key=lambda x: (x['rerank_score'] is None, -(x['rerank_score'] or 0.0)))
         
-        return ranked_results[:top_k]
\ No newline at end of file
+        return ranked_results[:top_k]
@@ -0,0 +1,261 @@
+import unittest
+import sys
+import os
+import json
+import time
+import types
+import threading
+import tempfile
+import numpy as np
+import networkx as nx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+import main
+from src.cache.response_cache import ResponseCache
+from src.graph.graph_snapshot import GraphView
+from src.llm.answer_generator import AnswerGenerator
+from src.llm.llm_backends import FakeLLMBackend
+from src.llm.llm_client import LLMClient
+from src.pipeline.ambedkargpt import AmbedkarGPT
+from src.pipeline.startup import StartupManager
+
+class StubSearch:
+    """Search engine stand-in that records when each call ran, on which thread."""
+    def __init__(self, results, delay=0.0):
+        self.results = results
+        self.delay = delay
+        self.calls = []
+
+    def search(self, query, top_k=5, query_emb=None):
+        start = time.perf_counter()
+        time.sleep(self.delay)
+        self.calls.append((start, time.perf_counter(), threading.current_thread().name))
+        return [dict(r) for r in self.results][:top_k]
+
+    def subgraph_for_results(self, results, max_nodes=20):
+        return {"nodes": [{"id": "Caste"}], "links": []}
+
+class StubBot:
+    """The parts of AmbedkarGPT the API touches, with the fake LLM backend behind a real generator."""
+    def __init__(self, search_delay=0.0, llm=None):
+        self.startup = StartupManager()
+        self.startup.add("bot", lambda: None)
+        self.startup.start().wait()
+        self.embedder = types.SimpleNamespace(encode_query=lambda q: np.ones((1, 4), dtype=np.float32))
+        self.local_search = StubSearch([{"chunk_id": "CHUNK_1", "text": "Caste is a social evil.",
+                                         "score": np.float32(0.8)}], delay=search_delay)
+        self.global_search = StubSearch([{"community_id": "0", "text": "On caste.",
+                                          "score": np.float32(0.5)}], delay=search_delay)
+        self.ranker = types.SimpleNamespace(rerank=lambda results, query, **kw: results, first_stage_k=20)
+        self.llm = llm or FakeLLMBackend()
+        self.generator = AnswerGenerator(llm_client=LLMClient(backend=self.llm, cache=False))
+        self.response_cache = ResponseCache()
+
+    @property
+    def ready(self):
+        return self.startup.ready
+
+class APITestCase(unittest.TestCase):
+    def setUp(self):
+        self.saved_bot = main.bot
+        self.client = TestClient(main.app)
+
+    def tearDown(self):
+        main.bot = self.saved_bot
+
+class TestChat(APITestCase):
+    def test_answers_then_serves_repeat_from_cache(self):
+        main.bot = bot = StubBot()
+        first = self.client.post("/chat", json={"query": "What is caste?"})
+        self.assertEqual(first.status_code, 200)
+        body = first.json()
+        self.assertTrue(body["answer"].startswith("Fake answer"))
+        self.assertIn("--- Sources ---", body["answer"])
+        self.assertEqual(body["context"]["local"][0]["chunk_id"], "CHUNK_1")
+        self.assertEqual(body["graph_data"]["nodes"], [{"id": "Caste"}])
+
+        again = self.client.post("/chat", json={"query": "what is caste"})
+        self.assertEqual(again.json(), body)
+        self.assertEqual(bot.llm.calls, 1)
+
+    def test_cli_answers_are_cached_in_the_chat_shape(self):
+        main.bot = bot = StubBot()
+        answer = AmbedkarGPT.query(bot, "What is caste?")
+        body = self.client.post("/chat", json={"query": "what is caste"}).json()
+        self.assertEqual(bot.llm.calls, 1)
+        self.assertEqual(body["answer"], answer)
+        self.assertEqual(body["context"]["local"][0]["chunk_id"], "CHUNK_1")
+        self.assertEqual(body["metrics"]["source_count"], 2)
+        self.assertEqual(body["graph_data"]["nodes"], [{"id": "Caste"}])
+
+    def test_local_and_global_search_run_concurrently(self):
+        main.bot = bot = StubBot(search_delay=0.2)
+        self.assertEqual(self.client.post("/chat", json={"query": "caste"}).status_code, 200)
+        (local_start, local_end, local_thread), = bot.local_search.calls
+        (global_start, global_end, global_thread), = bot.global_search.calls
+        self.assertNotEqual(local_thread, global_thread)
+        self.assertLess(max(local_start, global_start), min(local_end, global_end))
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+class TestChatStream(APITestCase):
+    def stream(self, query):
+        response = self.client.post("/chat/stream", json={"query": query})
+        self.assertEqual(response.status_code, 200)
+        return parse_events(response.text)
+
+    def test_context_then_tokens_then_done(self):
+        main.bot = StubBot()
+        events = self.stream("What is caste?")
+        names = [name for name, _ in events]
+        self.assertEqual(names[0], "context")
+        self.assertEqual(names[-1], "done")
+        self.assertGreater(names.count("token"), 1)
+        self.assertEqual(set(names[1:-1]), {"token"})
+        self.assertIn("citations", events[0][1])
+        self.assertIn("--- Sources ---", events[-1][1]["sources"])
+
+    def test_cached_replay_keeps_sources_in_done(self):
+        main.bot = bot = StubBot()
+        first = self.stream("What is caste?")
+        replay = self.stream("what is caste")
+        self.assertEqual(bot.llm.calls, 1)
+        self.assertEqual([name for name, _ in replay], ["context", "token", "done"])
+        self.assertEqual(replay[1][1]["text"], "".join(data["text"] for name, data in first if name == "token"))
+        self.assertEqual(replay[2][1]["sources"], first[-1][1]["sources"])
+
+    def test_failure_before_context_sends_error_event(self):
+        main.bot = bot = StubBot()
+        def broken(*args, **kwargs):
+            raise RuntimeError("index corrupted")
+        bot.local_search.subgraph_for_results = broken
+        events = self.stream("What is caste?")
+        self.assertEqual(events[-1][0], "error")
+        self.assertNotIn("done", [name for name, _ in events])
+
+    def test_llm_failure_mid_stream_sends_error_event(self):
+        class BrokenStream(FakeLLMBackend):
+            async def astream(self, prompt):
+                yield "Partial "
+                raise RuntimeError("connection reset")
+
+        main.bot = bot = StubBot(llm=BrokenStream())
+        events = self.stream("What is caste?")
+        names = [name for name, _ in events]
+        self.assertEqual(names, ["context", "token", "error"])
+        self.assertEqual(events[1][1]["text"], "Partial ")
+        self.assertEqual(bot.response_cache.stats()["entries"], 0)
+
+class TestGraph(APITestCase):
+    def setUp(self):
+        super().setUp()
+        graph = nx.Graph()
+        graph.add_edges_from([("Caste", "Hinduism"), ("Caste", "Varna"), ("Caste", "Gandhi"),
+                              ("Gandhi", "Congress"), ("Buddhism", "Dhamma")])
+        main.bot = StubBot()
+        main.bot.local_search.graph = GraphView.from_networkx(graph)
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_path = main.config['paths']['community_path']
+        main.config['paths']['community_path'] = os.path.join(self.tmp.name, "communities.json")
+        self.write_communities({"0": ["Caste", "Hinduism", "Varna"], "1": ["Buddhism", "Dhamma"]})
+        main.graph_payload_cache.clear()
+        main.communities = None
+
+    def tearDown(self):
+        main.config['paths']['community_path'] = self.saved_path
+        main.graph_payload_cache.clear()
+        main.communities = None
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def write_communities(self, communities):
+        with open(main.config['paths']['community_path'], 'w') as f:
+            json.dump(communities, f)
+
+    def test_limit_keeps_highest_degree_nodes(self):
+        response = self.client.get("/graph", params={"limit": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({n["id"] for n in response.json()["nodes"]}, {"Caste", "Gandhi"})
+        self.assertEqual(len(self.client.get("/graph").json()["nodes"]), 7)
+        self.assertEqual(self.client.get("/graph", params={"limit": 0}).status_code, 422)
+
+    def test_etag_revalidates_with_304(self):
+        first = self.client.get("/graph", params={"limit": 3})
+        etag = first.headers["etag"]
+        self.assertEqual(first.headers["cache-control"], "no-cache")
+
+        again = self.client.get("/graph", params={"limit": 3}, headers={"If-None-Match": etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.headers["etag"], etag)
+        self.assertEqual(again.content, b"")
+        weak = self.client.get("/graph", params={"limit": 3}, headers={"If-None-Match": "W/" + etag})
+        self.assertEqual(weak.status_code, 304)
+
+        other = self.client.get("/graph", params={"limit": 4}, headers={"If-None-Match": etag})
+        self.assertEqual(other.status_code, 200)
+        self.assertNotEqual(other.headers["etag"], etag)
+
+    def test_community_filter_and_unknown_community(self):
+        response = self.client.get("/graph", params={"community": "1"})
+        self.assertEqual({n["id"] for n in response.json()["nodes"]}, {"Buddhism", "Dhamma"})
+        self.assertEqual(self.client.get("/graph", params={"community": "42"}).status_code, 404)
+
+    def test_new_graph_version_reloads_communities(self):
+        self.assertEqual(self.client.get("/graph", params={"community": "2"}).status_code, 404)
+        self.write_communities({"2": ["Gandhi", "Congress"]})
+        # Same graph version: the loaded communities are still served
+        self.assertEqual(self.client.get("/graph", params={"community": "2"}).status_code, 404)
+
+        graph = nx.Graph([("Gandhi", "Congress"), ("Gandhi", "Caste")])
+        main.bot.local_search.graph = GraphView.from_networkx(graph)
+        response = self.client.get("/graph", params={"community": "2"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({n["id"] for n in response.json()["nodes"]}, {"Gandhi", "Congress"})
+
+class TestReadinessGuard(APITestCase):
+    def test_starting_up_is_503(self):
+        bot = StubBot()
+        bot.startup = StartupManager()
+        release = threading.Event()
+        bot.startup.add("ranker", release.wait)
+        bot.startup.start()
+        main.bot = bot
+        try:
+            response = self.client.post("/chat", json={"query": "caste"})
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["retry-after"], "5")
+            self.assertEqual(self.client.post("/chat/stream", json={"query": "caste"}).status_code, 503)
+            readyz = self.client.get("/readyz")
+            self.assertEqual(readyz.status_code, 503)
+            self.assertEqual(readyz.json()["components"]["ranker"]["state"], "loading")
+        finally:
+            release.set()
+        bot.startup.wait()
+        self.assertEqual(self.client.get("/readyz").status_code, 200)
+        self.assertEqual(self.client.post("/chat", json={"query": "caste"}).status_code, 200)
+
+    def test_failed_startup_is_500(self):
+        def broken():
+            raise FileNotFoundError("graph snapshot missing")
+        bot = StubBot()
+        bot.startup = StartupManager()
+        bot.startup.add("local_search", broken)
+        bot.startup.start().wait()
+        main.bot = bot
+        self.assertEqual(self.client.post("/chat", json={"query": "caste"}).status_code, 500)
+        self.assertEqual(self.client.get("/readyz").status_code, 503)
+
+        main.bot = None
+        self.assertEqual(self.client.post("/chat", json={"query": "caste"}).status_code, 500)
+        self.assertEqual(self.client.get("/healthz").json(), {"status": "ok"})
+
+if __name__ == '__main__':
+    unittest.main()
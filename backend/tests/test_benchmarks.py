@@ -0,0 +1,33 @@
+import unittest
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import SyntheticCorpus
+from benchmarks.run_benchmarks import benchmark_scale, STAGES
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_corpus_shape(self):
+        corpus = SyntheticCorpus(scale=0.02, n_queries=10)
+        self.assertEqual(len(corpus.chunks), 36)
+        self.assertEqual(len(corpus.queries), 10)
+        # Every chunk links to the entities it mentions
+        chunk = corpus.chunks[0]
+        linked = set(corpus.graph.neighbors(f"CHUNK_{chunk['id']}"))
+        self.assertEqual(linked, set(corpus.chunk_entities[0]))
+        for name in linked:
+            self.assertIn(name, chunk['text'])
+
+    def test_benchmark_reports_every_stage(self):
+        args = argparse.Namespace(dim=64, seed=0, queries=10, warmup=2, memory_queries=3, rerank_cost_ms=0.0)
+        result = benchmark_scale(0.02, args)
+        self.assertEqual(set(result["stages"]), set(STAGES) | {"end_to_end"})
+        for stats in result["stages"].values():
+            self.assertEqual(stats["count"], 10)
+            self.assertLessEqual(stats["p50_ms"], stats["p95_ms"])
+            self.assertLessEqual(stats["p95_ms"], stats["p99_ms"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache.lru_cache import LRUCache, normalize_query
+from src.cache.response_cache import ResponseCache
+
+class TestLRUCache(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  How did Caste ORIGINATE?! "), "how did caste originate")
+
+    def test_lru_eviction_and_stats(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")          # "b" is now least recently used
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    def test_ttl_and_memory_bound(self):
+        cache = LRUCache(max_entries=10, ttl_seconds=0.05)
+        cache.put("a", 1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a"))
+
+        cache = LRUCache(max_entries=10, max_bytes=10, size_fn=len)
+        cache.put("a", "x" * 6)
+        cache.put("b", "y" * 6)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get("a"))
+
+class TestResponseCache(unittest.TestCase):
+    def test_exact_then_similar(self):
+        cache = ResponseCache(similarity=0.9)
+        emb = np.array([1.0, 0.0, 0.0])
+        cache.put("How did caste originate?", emb, {"answer": "A"})
+
+        self.assertEqual(cache.get_exact("how did caste originate"), {"answer": "A"})
+        self.assertIsNone(cache.get_exact("origin of caste"))
+        self.assertEqual(cache.get_similar(np.array([0.99, 0.1, 0.0])), {"answer": "A"})
+        self.assertIsNone(cache.get_similar(np.array([0.0, 1.0, 0.0])))
+
+        stats = cache.stats()
+        self.assertEqual((stats["exact_hits"], stats["similar_hits"]), (1, 1))
+
+    def test_invalidated_when_artifacts_change(self):
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            f.write("v1")
+        try:
+            cache = ResponseCache(artifact_paths=[f.name], check_interval=0)
+            cache.put("q", np.ones(3), {"answer": "A"})
+            self.assertIsNotNone(cache.get_exact("q"))
+
+            with open(f.name, 'w') as out:
+                out.write("version 2")
+            self.assertIsNone(cache.get_exact("q"))
+        finally:
+            os.unlink(f.name)
+
+if __name__ == '__main__':
+    unittest.main()
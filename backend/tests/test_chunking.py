@@ -1,6 +1,14 @@
 import unittest
+import os
+import tempfile
 from src.chunking.buffer_merger import BufferMerger
+from src.chunking.chunk_store import ChunkStore, write_chunk_store
+import src.chunking.semantic_chunker as chunker_module
+from src.chunking.semantic_chunker import SemanticChunker
 import numpy as np
+import spacy
+from pypdf import PdfWriter
+from pypdf.generic import ContentStream, DecodedStreamObject, DictionaryObject, NameObject
 
 class TestChunking(unittest.TestCase):
     def test_buffer_merger_logic(self):
@@ -12,5 +20,136 @@ class TestChunking(unittest.TestCase):
         should_merge = merger.should_merge(emb1, emb2, 10, 10)
         self.assertTrue(should_merge)
 
+    def reference_boundaries(self, merger, embeddings, token_counts):
+        # The old chunking loop, built on the stateless should_merge
+        boundaries, current, tokens = [], [], 0
+        for i, (emb, n) in enumerate(zip(embeddings, token_counts)):
+            if not current or not merger.should_merge(current, emb, tokens, n):
+                boundaries.append(i)
+                current, tokens = [], 0
+            current.append(emb)
+            tokens += n
+        return boundaries
+
+    def test_incremental_merger_matches_reference(self):
+        rng = np.random.default_rng(0)
+        # Drifting topics so that some sentences merge and some start new chunks
+        centers = rng.normal(size=(6, 16))
+        embeddings = np.array([centers[i // 20] + 0.6 * rng.normal(size=16) for i in range(120)])
+        token_counts = rng.integers(5, 60, size=120).tolist()
+        merger = BufferMerger(threshold=0.6, max_tokens=300)
+
+        expected = self.reference_boundaries(merger, embeddings, token_counts)
+        self.assertGreater(len(expected), 1)
+        self.assertEqual(merger.find_boundaries(embeddings, token_counts), expected)
+
+        chunks, starts, position = [], [], 0
+        for i, (emb, n) in enumerate(zip(embeddings, token_counts)):
+            finished = merger.add(f"s{i}", emb, n)
+            if finished is not None:
+                starts.append(position)
+                position += len(finished["text"].split())
+                chunks.append(finished)
+        chunks.append(merger.flush())
+        starts.append(position)
+        self.assertEqual(starts, expected)
+
+        # Centroid is the plain mean of the member sentence embeddings
+        first = embeddings[expected[0]:expected[1]]
+        np.testing.assert_allclose(chunks[0]["embedding"], first.mean(axis=0))
+        self.assertEqual(chunks[0]["token_count"], sum(token_counts[expected[0]:expected[1]]))
+        self.assertIsNone(merger.flush())
+
+class TestChunkStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store_dir = os.path.join(self.tmp.name, "chunk_store")
+        rng = np.random.default_rng(0)
+        self.chunks = [
+            {"id": i, "text": text, "token_count": len(text.split()), "embedding": rng.normal(size=8)}
+            for i, text in enumerate(["Annihilation of Caste.", "Dr. Ambedkar — on Manu", "", "Endogamy"])
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_is_memory_mapped(self):
+        meta = write_chunk_store(self.chunks, self.store_dir, model_name="all-MiniLM-L6-v2")
+        store = ChunkStore.load(self.store_dir)
+
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.version, meta["version"])
+        self.assertIsInstance(store.embeddings, np.memmap)
+        self.assertEqual(store.embeddings.dtype, np.float32)
+        for chunk in self.chunks:
+            self.assertEqual(store.text(chunk["id"]), chunk["text"])
+            np.testing.assert_allclose(store.embedding(chunk["id"]), chunk["embedding"], rtol=1e-6)
+        self.assertEqual(store.get(1), {"id": 1, "text": "Dr. Ambedkar — on Manu", "token_count": 5})
+        self.assertEqual([c["text"] for c in store], [c["text"] for c in self.chunks])
+
+        # Same content gives the same version, in memory or on disk
+        self.assertEqual(ChunkStore.from_chunks(self.chunks).version, store.version)
+
+    def test_non_contiguous_ids(self):
+        chunks = [dict(c, id=c["id"] * 10 + 3) for c in self.chunks]
+        write_chunk_store(chunks, self.store_dir)
+        store = ChunkStore.load(self.store_dir)
+        self.assertEqual(store.text(13), "Dr. Ambedkar — on Manu")
+        with self.assertRaises(KeyError):
+            store.text(1)
+
+def write_pdf(path, pages):
+    """Writes a PDF with one line of Helvetica text per page."""
+    writer = PdfWriter()
+    font = DictionaryObject({NameObject("/Type"): NameObject("/Font"), NameObject("/Subtype"): NameObject("/Type1"),
+                             NameObject("/BaseFont"): NameObject("/Helvetica")})
+    for text in pages:
+        page = writer.add_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1"))
+        page.replace_contents(ContentStream(stream, writer))
+    writer.write(path)
+
+class TestPdfStreaming(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp.name, "book.pdf")
+        self.saved_chunking = dict(chunker_module.config['chunking'])
+        self.saved_get_nlp = chunker_module.get_nlp
+        # Rule-based sentence splitting, so the test needs no downloaded spaCy model
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        chunker_module.get_nlp = lambda **kwargs: nlp
+        # Only the PDF streaming is under test, so skip loading the embedding model
+        self.chunker = SemanticChunker.__new__(SemanticChunker)
+
+    def tearDown(self):
+        chunker_module.config['chunking'] = self.saved_chunking
+        chunker_module.get_nlp = self.saved_get_nlp
+        self.tmp.cleanup()
+
+    def test_parallel_extraction_keeps_page_order(self):
+        pages = [f"Page {i} of the book." for i in range(23)]
+        write_pdf(self.pdf_path, pages)
+        chunker_module.config['chunking'].update(pages_per_task=2, pdf_workers=3)
+        self.assertEqual(list(self.chunker.iter_pages(self.pdf_path)), pages)
+
+        chunker_module.config['chunking']['pdf_workers'] = 1
+        self.assertEqual(list(self.chunker.iter_pages(self.pdf_path)), pages)
+
+    def test_sentence_across_page_break_stays_whole(self):
+        write_pdf(self.pdf_path, [
+            "Caste is not merely a division of labour. It is also a division",
+            "of labourers into watertight compartments. Each page ends mid thought and",
+            "the final sentence closes on the last page.",
+        ])
+        chunker_module.config['chunking'].update(pages_per_task=1, pdf_workers=2)
+        self.assertEqual(self.chunker.get_sentences(self.pdf_path), [
+            "Caste is not merely a division of labour.",
+            "It is also a division of labourers into watertight compartments.",
+            "Each page ends mid thought and the final sentence closes on the last page.",
+        ])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
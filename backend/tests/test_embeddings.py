@@ -0,0 +1,202 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+import threading
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.embeddings.embedding_store import save_embeddings, load_embeddings, load_or_encode
+from src.embeddings.batch_scheduler import MicroBatcher
+from src.embeddings.inference_backend import load_bi_encoder, load_cross_encoder
+from src.embeddings import embedding_service
+from src.retrieval import global_search as global_search_module
+from src.retrieval.global_search import GlobalSearch
+from src.embeddings.backend_parity import ranking_agreement, bi_encoder_parity, cross_encoder_parity
+
+class TestEmbeddingStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "source.json")
+        with open(self.source, 'w') as f:
+            f.write('["a", "b"]')
+        self.npy = os.path.join(self.tmp.name, "emb.npy")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_is_memory_mapped(self):
+        matrix = np.random.rand(2, 4)
+        save_embeddings(self.npy, matrix, "model-a", self.source)
+        loaded = load_embeddings(self.npy, "model-a", self.source)
+        self.assertIsInstance(loaded, np.memmap)
+        np.testing.assert_allclose(loaded, matrix.astype(np.float32))
+
+    def test_key_mismatch_triggers_reencode(self):
+        save_embeddings(self.npy, np.zeros((2, 4)), "model-a", self.source)
+        # Different model -> stale
+        self.assertIsNone(load_embeddings(self.npy, "model-b", self.source))
+
+        # Changed source -> stale, and load_or_encode re-encodes
+        with open(self.source, 'w') as f:
+            f.write('["a", "c"]')
+        calls = []
+        def encode(texts):
+            calls.append(texts)
+            return np.ones((len(texts), 4))
+        result = load_or_encode(self.npy, "model-a", self.source, ["a", "c"], encode)
+        self.assertEqual(len(calls), 1)
+        np.testing.assert_allclose(result, np.ones((2, 4)))
+
+        # Second load hits the refreshed cache
+        load_or_encode(self.npy, "model-a", self.source, ["a", "c"], encode)
+        self.assertEqual(len(calls), 1)
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_callers_share_batches(self):
+        batch_sizes = []
+        def square_all(items):
+            batch_sizes.append(len(items))
+            # Callers arriving while a batch runs queue up for the next one
+            time.sleep(0.01)
+            return [x * x for x in items]
+
+        batcher = MicroBatcher(square_all, max_batch_size=64, max_wait_ms=20)
+        results = {}
+        def worker(i):
+            results[i] = batcher([i, i + 100])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Every caller gets its own outputs back, in order
+        for i in range(20):
+            self.assertEqual(results[i], [i * i, (i + 100) ** 2])
+        self.assertLess(len(batch_sizes), 20)
+        self.assertEqual(sum(batch_sizes), 40)
+
+    def test_lone_request_does_not_wait(self):
+        batcher = MicroBatcher(lambda items: items, max_wait_ms=500)
+        batcher([0])  # starts the worker
+        start = time.perf_counter()
+        self.assertEqual(batcher([1, 2]), [1, 2])
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+    def test_errors_reach_every_caller(self):
+        def fail(items):
+            raise ValueError("boom")
+        batcher = MicroBatcher(fail, max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher([1])
+
+class RecordingEmbedder:
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, texts, **kwargs):
+        self.encoded += len(texts)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    def encode_query(self, query):
+        return self.encode([query])
+
+class TestStoredEmbeddingsStayReference(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_paths = dict(global_search_module.config['paths'])
+        paths = global_search_module.config['paths']
+        paths['summaries_path'] = os.path.join(self.tmp.name, "summaries.json")
+        paths['summary_embeddings'] = os.path.join(self.tmp.name, "summary_embeddings.npy")
+        with open(paths['summaries_path'], 'w') as f:
+            f.write('{"0": "caste", "1": "democracy"}')
+        # Stands in for the fp32 service in the process-wide registry
+        self.model_name = global_search_module.config['chunking']['model_name']
+        self.reference = RecordingEmbedder()
+        embedding_service._services[(self.model_name, "torch")] = self.reference
+
+    def tearDown(self):
+        embedding_service._services.pop((self.model_name, "torch"), None)
+        global_search_module.config['paths'] = self.saved_paths
+        self.tmp.cleanup()
+
+    def test_stale_embeddings_are_encoded_with_the_reference_model(self):
+        serving = RecordingEmbedder()
+        search = GlobalSearch(embedder=serving)
+        self.assertEqual(self.reference.encoded, 2)
+        self.assertEqual(serving.encoded, 0)
+        self.assertEqual(search.comm_embeddings.shape, (2, 4))
+
+def save_tiny_bert(out_dir, num_labels=None):
+    """
+    A randomly initialised two-layer BERT saved locally, so backends can be compared offline.
+    """
+    import torch
+    from transformers import BertConfig, BertModel, BertForSequenceClassification, BertTokenizerFast
+    words = "the a of and to in is was caste dr ambedkar said about what did constitution india rights".split()
+    os.makedirs(out_dir, exist_ok=True)
+    vocab_path = os.path.join(out_dir, "vocab.txt")
+    with open(vocab_path, 'w') as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words))
+    bert_config = BertConfig(vocab_size=len(words) + 5, hidden_size=64, num_hidden_layers=2,
+                             num_attention_heads=2, intermediate_size=128, max_position_embeddings=64)
+    torch.manual_seed(0)
+    if num_labels is None:
+        model = BertModel(bert_config)
+    else:
+        bert_config.num_labels = num_labels
+        model = BertForSequenceClassification(bert_config)
+    model.save_pretrained(out_dir)
+    BertTokenizerFast(vocab_path).save_pretrained(out_dir)
+    return out_dir
+
+class TestInferenceBackends(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.bi_path = save_tiny_bert(os.path.join(cls.tmp.name, "bi"))
+        cls.ce_path = save_tiny_bert(os.path.join(cls.tmp.name, "ce"), num_labels=1)
+        cls.queries = ["what did dr ambedkar say about caste", "constitution of india", "rights"]
+        cls.passages = ["dr ambedkar said caste", "the constitution", "rights of india", "the caste",
+                        "what is in a constitution", "india and caste", "about rights", "a the of"]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_ranking_agreement(self):
+        self.assertEqual(ranking_agreement([3, 2, 1, 0], [3, 2, 1, 0], k=2),
+                         {"top1": 1.0, "overlap_at_k": 1.0, "spearman": 1.0})
+        swapped = ranking_agreement([3, 2, 1, 0], [2, 3, 0, 1], k=2)
+        self.assertEqual(swapped["top1"], 0.0)
+        self.assertEqual(swapped["overlap_at_k"], 1.0)
+        self.assertLess(swapped["spearman"], 1.0)
+
+    def test_int8_models_are_quantized_and_keep_rankings(self):
+        bi_report, _ = bi_encoder_parity(load_bi_encoder(self.bi_path, "torch"),
+                                         load_bi_encoder(self.bi_path, "torch-int8"),
+                                         self.queries, self.passages, k=3, repeats=1)
+        self.assertGreater(bi_report["query_cosine"], 0.98)
+        self.assertGreaterEqual(bi_report["agreement"]["spearman"], 0.9)
+        self.assertLess(bi_report["candidate_mb"], bi_report["reference_mb"])
+
+        # An untrained classifier scores everything alike, so only check the scores stay close
+        fp32_ce = load_cross_encoder(self.ce_path, "torch")
+        int8_ce = load_cross_encoder(self.ce_path, "torch-int8")
+        self.assertIn("DynamicQuantizedLinear", repr(int8_ce.model))
+        pairs = [[q, p] for q in self.queries for p in self.passages]
+        np.testing.assert_allclose(int8_ce.predict(pairs), fp32_ce.predict(pairs), atol=0.01)
+        ce_report = cross_encoder_parity(fp32_ce, int8_ce, self.queries,
+                                         [self.passages] * len(self.queries), k=3, repeats=1)
+        self.assertLess(ce_report["candidate_mb"], ce_report["reference_mb"])
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            load_bi_encoder(self.bi_path, "tensorrt")
+
+if __name__ == '__main__':
+    unittest.main()
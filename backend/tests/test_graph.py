@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import tempfile
+import networkx as nx
+import spacy
+from spacy.language import Language
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+from src.graph.graph_snapshot import GraphView, write_snapshot
+from src.graph.cooccurrence import cooccurrence_edges
+from src.graph.entity_extractor import EntityExtractor
+
+def build_sample_graph():
+    G = nx.Graph()
+    G.add_node("CHUNK_0", type="chunk", text="Caste and endogamy.")
+    G.add_node("CHUNK_1", type="chunk", text="Manu and caste.")
+    for entity in ["Caste", "Endogamy", "Manu"]:
+        G.add_node(entity, type="entity")
+    G.add_edge("CHUNK_0", "Caste")
+    G.add_edge("CHUNK_0", "Endogamy")
+    G.add_edge("CHUNK_1", "Caste")
+    G.add_edge("CHUNK_1", "Manu")
+    G.add_edge("Caste", "Endogamy", weight=2)
+    G.add_edge("Caste", "Manu", weight=2)
+    return G
+
+@Language.component("pair_parser")
+def pair_parser(doc):
+    """
+    Stand-in parse so noun_chunks works without a trained model: every token is a noun,
+    and each even token is a compound modifier of the one after it.
+    """
+    for i, token in enumerate(doc):
+        token.pos_ = "NOUN"
+        if i % 2 == 0 and i + 1 < len(doc):
+            token.head, token.dep_ = doc[i + 1], "compound"
+        else:
+            token.head, token.dep_ = token, "ROOT"
+    return doc
+
+class PatternExtractor(EntityExtractor):
+    """EntityExtractor over a rule-based pipeline (entity_ruler + pair_parser) instead of en_core_web_sm."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._nlp = spacy.blank("en")
+        ruler = self._nlp.add_pipe("entity_ruler")
+        ruler.add_patterns([
+            {"label": "PERSON", "pattern": "Ambedkar"},
+            {"label": "ORG", "pattern": [{"LOWER": "constituent"}, {"LOWER": "assembly"}]},
+            {"label": "LAW", "pattern": "Manusmriti"},
+        ])
+        self._nlp.add_pipe("pair_parser")
+
+    @property
+    def nlp(self):
+        return self._nlp
+
+class TestEntityExtractor(unittest.TestCase):
+    def setUp(self):
+        words = ["Ambedkar", "burned", "the", "Manusmriti", "before", "the", "Constituent", "Assembly",
+                 "debated", "caste", "and", "untouchability", "in", "village", "life"]
+        rng = random.Random(3)
+        self.texts = [" ".join(rng.choice(words) for _ in range(rng.randint(0, 30))) for _ in range(40)]
+
+    def test_batch_matches_one_at_a_time_in_order(self):
+        expected = [PatternExtractor().extract_entities(text) for text in self.texts]
+        self.assertTrue(any(expected))
+        for batch_size, n_process in [(1, 1), (7, 1), (64, 1), (4, 2)]:
+            extractor = PatternExtractor(batch_size=batch_size, n_process=n_process)
+            self.assertEqual(list(extractor.extract_batch(self.texts)), expected)
+
+class TestGraphSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.graph = build_sample_graph()
+        self.tmp = tempfile.TemporaryDirectory()
+        write_snapshot(self.graph, self.tmp.name)
+        self.view = GraphView.load(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_view_matches_networkx(self):
+        self.assertEqual(self.view.number_of_nodes(), 5)
+        self.assertEqual(self.view.number_of_edges(), self.graph.number_of_edges())
+        self.assertEqual(self.view.nodes_of_type('entity'), ["Caste", "Endogamy", "Manu"])
+        self.assertEqual(set(self.view.neighbors("Caste")), set(self.graph.neighbors("Caste")))
+        self.assertEqual(self.view.top_degree_nodes(1), ["Caste"])
+
+    def test_subgraph_data_matches_node_link_data(self):
+        nodes = ["CHUNK_0", "Caste", "Endogamy"]
+        expected = nx.node_link_data(self.graph.subgraph(nodes), edges="links")
+        actual = self.view.subgraph_data(nodes)
+
+        norm_link = lambda l: (tuple(sorted((l['source'], l['target']))), l.get('weight'))
+        self.assertEqual(sorted(map(norm_link, expected['links'])), sorted(map(norm_link, actual['links'])))
+        self.assertEqual({n['id'] for n in expected['nodes']}, {n['id'] for n in actual['nodes']})
+
+    def test_entity_chunk_incidence(self):
+        incidence = self.view.incidence_matrix('entity', 'chunk').toarray()
+        # Rows: Caste, Endogamy, Manu / Cols: CHUNK_0, CHUNK_1
+        self.assertEqual(incidence.tolist(), [[1, 1], [1, 0], [0, 1]])
+
+class TestCooccurrence(unittest.TestCase):
+    def test_matches_nested_loop_weights(self):
+        random.seed(7)
+        vocab = [f"entity_{i}" for i in range(30)]
+        chunk_entities = [random.sample(vocab, random.randint(0, 8)) for _ in range(50)]
+
+        # Reference: the original per-chunk nested loop
+        expected = nx.Graph()
+        for entities in chunk_entities:
+            for entity in entities:
+                for other in entities:
+                    if entity != other:
+                        if expected.has_edge(entity, other):
+                            expected[entity][other]['weight'] += 1
+                        else:
+                            expected.add_edge(entity, other, weight=1)
+
+        names, rows, cols, weights = cooccurrence_edges(chunk_entities)
+        actual = {frozenset((names[r], names[c])): w for r, c, w in zip(rows, cols, weights)}
+        self.assertEqual(actual, {frozenset((u, v)): d['weight'] for u, v, d in expected.edges(data=True)})
+
+if __name__ == '__main__':
+    unittest.main()
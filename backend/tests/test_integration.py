@@ -12,7 +12,6 @@ class TestIntegration(unittest.TestCase):
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
         files_to_check = [
-            os.path.join(base_dir, "processed", "chunks.json"),
             os.path.join(base_dir, "processed", "knowledge_graph.pkl"),
             os.path.join(base_dir, "config.yaml")
         ]
@@ -20,5 +19,12 @@ class TestIntegration(unittest.TestCase):
         for f_path in files_to_check:
             self.assertTrue(os.path.exists(f_path), f"Missing critical file: {f_path}")
 
+        # Chunks live in the columnar store; a legacy chunks.json is still accepted
+        chunk_files = [
+            os.path.join(base_dir, "processed", "chunk_store", "meta.json"),
+            os.path.join(base_dir, "processed", "chunks.json")
+        ]
+        self.assertTrue(any(os.path.exists(p) for p in chunk_files), f"Missing chunk store: {chunk_files[0]}")
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,220 @@
+import unittest
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from src.llm.prompt_cache import PromptCache, prompt_key
+from src.llm.llm_backends import OllamaHTTPBackend, FakeLLMBackend
+from src.llm.llm_client import LLMClient, LLM_ERROR_MESSAGE
+
+class StandInOllama(BaseHTTPRequestHandler):
+    """
+    Answers /api/generate like Ollama, optionally failing the first few requests with a status code.
+    """
+    fail_first = 0
+    fail_status = 503
+    requests = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        cls = type(self)
+        cls.requests += 1
+        if cls.requests <= cls.fail_first:
+            self.send_response(cls.fail_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        answer = f"echo: {body['prompt']}"
+        if body["stream"]:
+            lines = [{"response": answer[i:i + 4], "done": False} for i in range(0, len(answer), 4)]
+            lines.append({"response": "", "done": True})
+            payload = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+        else:
+            payload = json.dumps({"response": answer, "done": True}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class TestPromptCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "llm_cache.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_persists_across_instances(self):
+        cache = PromptCache(self.path)
+        key = prompt_key("mistral", 0.3, "What is caste?")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "An answer.")
+        cache.close()
+
+        reopened = PromptCache(self.path)
+        self.assertEqual(reopened.get(key), "An answer.")
+        # Model and temperature are part of the key
+        self.assertNotEqual(key, prompt_key("mistral", 0.7, "What is caste?"))
+        self.assertNotEqual(key, prompt_key("llama3", 0.3, "What is caste?"))
+        reopened.close()
+
+    def test_evicts_least_recently_used_over_budget(self):
+        cache = PromptCache(self.path, max_bytes=30)
+        cache.put("a", "x" * 10)
+        cache.put("b", "x" * 10)
+        cache.get("a")
+        cache.put("c", "x" * 15)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "x" * 10)
+        self.assertLessEqual(cache.total_bytes(), 30)
+        self.assertEqual(cache.evictions, 1)
+        cache.close()
+
+    def test_running_total_matches_stored_sizes(self):
+        cache = PromptCache(self.path)
+        cache.put("a", "x" * 10)
+        cache.put("a", "x" * 4)
+        cache.put("b", "y" * 7)
+        self.assertEqual(cache.total_bytes(), 11)
+        cache.close()
+        self.assertEqual(PromptCache(self.path).total_bytes(), 11)
+
+class TestLLMClient(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PromptCache(os.path.join(self.tmp.name, "llm_cache.sqlite"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_cache_hit_skips_generation(self):
+        backend = FakeLLMBackend()
+        client = LLMClient(backend=backend, cache=self.cache)
+        first = client.complete("prompt one")
+        self.assertEqual(client.complete("prompt one"), first)
+        self.assertEqual(asyncio.run(client.agenerate_answer("prompt one")), first)
+        self.assertEqual(backend.calls, 1)
+
+        # A fresh client over the same cache file (e.g. the next pipeline run) hits too
+        replay = FakeLLMBackend()
+        LLMClient(backend=replay, cache=self.cache).complete("prompt one")
+        self.assertEqual(replay.calls, 0)
+
+    def test_streamed_answer_is_cached(self):
+        backend = FakeLLMBackend()
+        client = LLMClient(backend=backend, cache=self.cache)
+
+        async def collect():
+            return [token async for token in client.astream_answer("prompt two")]
+
+        tokens = asyncio.run(collect())
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(asyncio.run(collect()), ["".join(tokens)])
+        self.assertEqual(backend.calls, 1)
+
+    def test_stream_failure_raises_once_tokens_were_sent(self):
+        class BrokenStream(FakeLLMBackend):
+            def __init__(self, after):
+                super().__init__()
+                self.after = after
+
+            async def astream(self, prompt):
+                for token in ["Partial ", "answer "][:self.after]:
+                    yield token
+                raise RuntimeError("connection reset")
+
+        async def collect(client, prompt, received):
+            async for token in client.astream_answer(prompt):
+                received.append(token)
+
+        # Nothing sent yet: the canned message stands in for the answer
+        received = []
+        asyncio.run(collect(LLMClient(backend=BrokenStream(after=0), cache=self.cache), "prompt five", received))
+        self.assertEqual(received, [LLM_ERROR_MESSAGE])
+
+        received = []
+        with self.assertRaises(RuntimeError):
+            asyncio.run(collect(LLMClient(backend=BrokenStream(after=1), cache=self.cache), "prompt six", received))
+        self.assertEqual(received, ["Partial "])
+        self.assertIsNone(LLMClient(backend=FakeLLMBackend(), cache=self.cache)._cached("prompt six"))
+
+    def test_async_paths_keep_cache_io_off_the_event_loop(self):
+        threads = []
+        cache = self.cache
+
+        class RecordingCache:
+            def get(self, key):
+                threads.append(threading.current_thread())
+                return cache.get(key)
+
+            def put(self, key, response):
+                threads.append(threading.current_thread())
+                cache.put(key, response)
+
+        client = LLMClient(backend=FakeLLMBackend(), cache=RecordingCache())
+
+        async def run():
+            await client.agenerate_answer("prompt three")
+            return [token async for token in client.astream_answer("prompt four")]
+
+        asyncio.run(run())
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(threading.main_thread(), threads)
+
+class TestOllamaHTTPBackend(unittest.TestCase):
+    def setUp(self):
+        StandInOllama.requests = 0
+        StandInOllama.fail_first = 0
+        StandInOllama.fail_status = 503
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInOllama)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.backend = OllamaHTTPBackend(
+            "stand-in", 0.0, base_url=f"http://127.0.0.1:{self.server.server_port}",
+            max_retries=2, backoff_seconds=0.01
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_generate_and_stream(self):
+        self.assertEqual(self.backend.generate("hello there"), "echo: hello there")
+
+        async def collect():
+            return "".join([token async for token in self.backend.astream("hello there")])
+
+        self.assertEqual(asyncio.run(collect()), "echo: hello there")
+
+    def test_retries_transient_errors(self):
+        StandInOllama.fail_first = 2
+        self.assertEqual(self.backend.generate("again"), "echo: again")
+        self.assertEqual(StandInOllama.requests, 3)
+
+    def test_gives_up_after_bounded_retries(self):
+        StandInOllama.fail_first = 10
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.backend.generate("never")
+        self.assertEqual(StandInOllama.requests, 3)
+
+        # Client errors are not retried, and generate_answer reports them as the canned message
+        StandInOllama.requests = 0
+        StandInOllama.fail_status = 400
+        client = LLMClient(backend=self.backend, cache=False)
+        self.assertEqual(client.generate_answer("bad request"), LLM_ERROR_MESSAGE)
+        self.assertEqual(StandInOllama.requests, 1)
+
+if __name__ == '__main__':
+    unittest.main()
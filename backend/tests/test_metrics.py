@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.monitoring.metrics import MetricsRegistry
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        for seconds in [0.0004, 0.001, 0.003, 100]:
+            registry.observe("rerank", seconds)
+        text = registry.render()
+
+        self.assertIn('ambedkargpt_stage_seconds_bucket{stage="rerank",le="0.0005"} 1', text)
+        # le is inclusive: 0.001 lands in the 0.001 bucket
+        self.assertIn('ambedkargpt_stage_seconds_bucket{stage="rerank",le="0.001"} 2', text)
+        self.assertIn('ambedkargpt_stage_seconds_bucket{stage="rerank",le="0.005"} 3', text)
+        self.assertIn('ambedkargpt_stage_seconds_bucket{stage="rerank",le="60"} 3', text)
+        self.assertIn('ambedkargpt_stage_seconds_bucket{stage="rerank",le="+Inf"} 4', text)
+        self.assertIn('ambedkargpt_stage_seconds_count{stage="rerank"} 4', text)
+
+    def test_spans_counters_and_gauges(self):
+        registry = MetricsRegistry()
+        with registry.span("local_search"):
+            pass
+        registry.record_request("chat", "cached")
+        registry.record_request("chat", "cached")
+        registry.record_prompt("x" * 300)
+        registry.count_candidates("chunks", 7)
+        registry.gauge("response_cache_hit_rate", "Hit rate.", lambda: 0.5)
+        registry.gauge("broken", "Raises at scrape time.", lambda: 1 / 0)
+        text = registry.render()
+
+        self.assertIn('ambedkargpt_stage_seconds_count{stage="local_search"} 1', text)
+        self.assertIn('ambedkargpt_requests_total{endpoint="chat",outcome="cached"} 2', text)
+        self.assertIn('ambedkargpt_prompt_chars_bucket{le="500"} 1', text)
+        self.assertIn('ambedkargpt_candidates_sum{stage="chunks"} 7', text)
+        self.assertIn("# TYPE ambedkargpt_response_cache_hit_rate gauge\nambedkargpt_response_cache_hit_rate 0.5", text)
+        # A failing gauge is skipped rather than breaking the scrape
+        self.assertNotIn("ambedkargpt_broken", text)
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        with registry.span("rerank"):
+            pass
+        registry.observe("generate", 1.0)
+        registry.record_request("chat", "generated")
+        registry.count_candidates("chunks", 3)
+        self.assertNotIn("stage=", registry.render())
+        self.assertNotIn("endpoint=", registry.render())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import unittest
+import sys
+import os
+import json
+import time
+import types
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pipeline.build_pipeline import BuildPipeline, fingerprint
+from src.graph import summarizer as summarizer_module
+from src.chunking import chunk_store as chunk_store_module
+from src.chunking.chunk_store import write_chunk_store
+from src.graph.summarizer import CommunitySummarizer
+from src.llm.llm_backends import OllamaHTTPBackend
+from src.llm.llm_client import LLMClient
+from src.pipeline.startup import StartupManager
+
+class StandInLLMHandler(BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for Ollama's /api/generate: sleeps, then echoes the prompt's first text line.
+    Tracks the peak number of requests in flight.
+    """
+    delay = 0.1
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+    prompts = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+            cls.prompts.append(body["prompt"])
+        time.sleep(cls.delay)
+        with cls.lock:
+            cls.in_flight -= 1
+
+        text = body["prompt"].split("TEXT:")[1].strip().splitlines()[0]
+        payload = json.dumps({"response": f"About {text}", "done": True}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class OfflineSummarizer(CommunitySummarizer):
+    def save_summary_embeddings(self, summaries, output_path):
+        pass
+
+class TestBuildPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, "out.json")
+        self.calls = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_pipeline(self, force=()):
+        pipeline = BuildPipeline(force=force)
+        pipeline.manifest = {}
+        pipeline.manifest_path = os.path.join(self.tmp.name, "manifest.json")
+        return pipeline
+
+    def build(self):
+        self.calls += 1
+        with open(self.output, 'w') as f:
+            f.write("{}")
+
+    def test_stage_skips_when_inputs_unchanged(self):
+        pipeline = self.make_pipeline()
+        fp = fingerprint("abc", "model-a")
+        self.assertTrue(pipeline.run_stage("graph", fp, [self.output], self.build))
+        self.assertFalse(pipeline.run_stage("graph", fp, [self.output], self.build))
+        self.assertEqual(self.calls, 1)
+
+        # Changed input, missing output, or --force all trigger a rebuild
+        self.assertTrue(pipeline.run_stage("graph", fingerprint("abc", "model-b"), [self.output], self.build))
+        os.remove(self.output)
+        self.assertTrue(pipeline.run_stage("graph", fingerprint("abc", "model-b"), [self.output], self.build))
+        pipeline.force = {"graph"}
+        self.assertTrue(pipeline.run_stage("graph", fingerprint("abc", "model-b"), [self.output], self.build))
+        self.assertEqual(self.calls, 4)
+
+    def test_community_key_follows_member_content(self):
+        key = CommunitySummarizer.community_key(["chunk one", "chunk two"])
+        # Member order (e.g. after community ids are renumbered) does not matter
+        self.assertEqual(key, CommunitySummarizer.community_key(["chunk two", "chunk one"]))
+        self.assertNotEqual(key, CommunitySummarizer.community_key(["chunk one", "chunk two, edited"]))
+
+class TestCommunitySummarizer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved_paths = dict(summarizer_module.config['paths'])
+        self.saved_store_paths = dict(chunk_store_module.config['paths'])
+        chunk_store_module.config['paths']['chunk_store'] = os.path.join(self.tmp.name, "chunk_store")
+        paths = summarizer_module.config['paths']
+        for key, name in [('community_path', 'communities.json'), ('summaries_path', 'summaries.json'), ('summary_cache', 'summary_cache.json'),
+                          ('summary_checkpoint', 'checkpoint.jsonl')]:
+            paths[key] = os.path.join(self.tmp.name, name)
+
+        chunks = [{"id": i, "text": f"chunk {i}"} for i in range(12)]
+        self.communities = {str(c): [f"CHUNK_{c}", f"Entity {c}"] for c in range(12)}
+        write_chunk_store(chunks, chunk_store_module.config['paths']['chunk_store'])
+        with open(paths['community_path'], 'w') as f:
+            json.dump(self.communities, f)
+
+        StandInLLMHandler.peak = 0
+        StandInLLMHandler.prompts = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInLLMHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        backend = OllamaHTTPBackend("stand-in", 0.0, base_url=f"http://127.0.0.1:{self.server.server_port}")
+        self.client = LLMClient(backend=backend, cache=False)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        summarizer_module.config['paths'] = self.saved_paths
+        chunk_store_module.config['paths'] = self.saved_store_paths
+        self.tmp.cleanup()
+
+    def test_concurrent_summaries_against_stand_in_server(self):
+        start = time.perf_counter()
+        summaries = OfflineSummarizer(llm_client=self.client, workers=4).generate_summaries()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(list(summaries), list(self.communities))
+        self.assertEqual(summaries["3"], "About chunk 3")
+        self.assertGreater(StandInLLMHandler.peak, 1)
+        # 12 calls x 0.1s would take 1.2s one at a time
+        self.assertLess(elapsed, 0.9)
+        self.assertFalse(os.path.exists(summarizer_module.config['paths']['summary_checkpoint']))
+
+        # A second run finds everything in the summary cache
+        OfflineSummarizer(llm_client=self.client, workers=4).generate_summaries()
+        self.assertEqual(len(StandInLLMHandler.prompts), 12)
+
+    def test_resumes_from_checkpoint(self):
+        summarizer = OfflineSummarizer(llm_client=self.client, workers=2)
+        # An interrupted run had already finished communities 0 and 1
+        with open(summarizer.checkpoint_path, 'w') as f:
+            for c in ["0", "1"]:
+                key = CommunitySummarizer.community_key([f"chunk {c}"])
+                f.write(json.dumps({"key": key, "community": c, "summary": f"Saved {c}"}) + "\n")
+            f.write('{"key": "torn')
+
+        summaries = summarizer.generate_summaries()
+        self.assertEqual(summaries["0"], "Saved 0")
+        self.assertEqual(summaries["5"], "About chunk 5")
+        self.assertEqual(len(StandInLLMHandler.prompts), 10)
+
+class TestStartupManager(unittest.TestCase):
+    def test_independent_components_load_concurrently(self):
+        loaded = {}
+        def slow(name):
+            def load():
+                time.sleep(0.2)
+                return name
+            return load
+
+        loaded_target = types.SimpleNamespace()
+        manager = StartupManager(target=loaded_target)
+        for name in ["embedder", "ranker", "local_search"]:
+            manager.add(name, slow(name))
+        manager.add("wiring", lambda: loaded.setdefault("order", list(vars(loaded_target))),
+                    deps=["embedder", "ranker", "local_search"])
+
+        start = time.perf_counter()
+        self.assertFalse(manager.ready)
+        manager.start()
+        self.assertTrue(manager.wait(timeout=5))
+        # Three 0.2s loads side by side, not one after another
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(loaded_target.ranker, "ranker")
+        self.assertEqual(sorted(loaded["order"]), ["embedder", "local_search", "ranker"])
+
+        status = manager.status()
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["components"]["ranker"]["state"], "ready")
+        self.assertGreaterEqual(status["components"]["ranker"]["seconds"], 0.2)
+
+    def test_failure_propagates_to_dependents(self):
+        def broken():
+            raise FileNotFoundError("graph snapshot missing")
+
+        manager = StartupManager()
+        manager.add("local_search", broken)
+        manager.add("generator", lambda: "ok")
+        manager.add("wiring", lambda: None, deps=["local_search", "generator"])
+        manager.start()
+
+        self.assertFalse(manager.wait(timeout=5))
+        self.assertTrue(manager.failed)
+        components = manager.status()["components"]
+        self.assertEqual(components["generator"]["state"], "ready")
+        self.assertIn("graph snapshot missing", components["local_search"]["error"])
+        self.assertEqual(components["wiring"]["error"], "dependency local_search failed")
+
+if __name__ == '__main__':
+    unittest.main()
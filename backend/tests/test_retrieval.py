@@ -5,7 +5,15 @@ import os
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.retrieval.ranker import Ranker
+import types
+import tempfile
+import numpy as np
+import networkx as nx
+from src.retrieval.ranker import Ranker, config
+from src.retrieval.entity_index import ExactIndex, IVFIndex, recall_at_k
+from src.retrieval.entity_matcher import EntityMatcher
+from src.retrieval.local_search import LocalSearch
+from src.graph.graph_snapshot import GraphView
 
 class TestRetrieval(unittest.TestCase):
     def setUp(self):
@@ -29,5 +37,268 @@ class TestRetrieval(unittest.TestCase):
         except Exception as e:
             self.fail(f"Ranker crashed: {e}")
 
+class CountingCrossEncoder:
+    """Stand-in for CrossEncoder: scores by word overlap and records every pair it sees."""
+    def __init__(self):
+        self.seen = []
+
+    def predict(self, pairs):
+        self.seen.extend(pairs)
+        return [len(set(q.lower().split()) & set(t.lower().split())) for q, t in pairs]
+
+class TestRerankCache(unittest.TestCase):
+    def setUp(self):
+        self.model = CountingCrossEncoder()
+        self.ranker = Ranker(model=self.model)
+        self.results = [
+            {"chunk_id": "CHUNK_1", "text": "Caste is a social evil.", "score": 0.5},
+            {"chunk_id": "CHUNK_2", "text": "Democracy is essential for liberty.", "score": 0.4}
+        ]
+
+    def test_only_missing_pairs_are_scored(self):
+        first = self.ranker.rerank([dict(r) for r in self.results], "Social evil?")
+        self.assertEqual(first[0]['chunk_id'], "CHUNK_1")
+        self.assertEqual(len(self.model.seen), 2)
+
+        # Same normalized query + one new chunk: only the new pair reaches the model
+        more = self.results + [{"chunk_id": "CHUNK_3", "text": "Endogamy and caste.", "score": 0.3}]
+        self.ranker.rerank([dict(r) for r in more], "social evil")
+        self.assertEqual(len(self.model.seen), 3)
+        self.assertEqual(self.ranker.cache_stats()['hits'], 2)
+
+    def test_corpus_change_invalidates(self):
+        self.ranker.set_corpus_version("v1")
+        self.ranker.rerank([dict(r) for r in self.results], "social evil")
+        self.ranker.set_corpus_version("v2")
+        self.ranker.rerank([dict(r) for r in self.results], "social evil")
+        self.assertEqual(len(self.model.seen), 4)
+
+class TruncatingCrossEncoder(CountingCrossEncoder):
+    """Like a real cross-encoder, only sees the first max_words words of each passage."""
+    def __init__(self, max_words):
+        super().__init__()
+        self.max_words = max_words
+
+    def predict(self, pairs):
+        return super().predict([[q, " ".join(t.split()[:self.max_words])] for q, t in pairs])
+
+def long_text(n_words, tail=""):
+    return " ".join(["filler"] * n_words + tail.split())
+
+class TestCascadedRanker(unittest.TestCase):
+    def make_ranker(self, model, **settings):
+        ranker = Ranker(model=model)
+        ranker.window_tokens, ranker.window_overlap = 100, 20
+        for name, value in settings.items():
+            setattr(ranker, name, value)
+        return ranker
+
+    def test_windows_cover_the_tail(self):
+        windows = self.make_ranker(CountingCrossEncoder()).passage_windows(long_text(300, "social evil"))
+        self.assertEqual(len(windows), 4)
+        self.assertTrue(all(len(w.split()) <= 100 for w in windows))
+        self.assertTrue(windows[-1].endswith("social evil"))
+
+    def test_windows_are_sized_in_model_wordpieces(self):
+        from transformers import BertTokenizerFast
+        with tempfile.TemporaryDirectory() as tmp:
+            # Every letter after the first is its own "##" piece, so one word is many wordpieces
+            vocab_path = os.path.join(tmp, "vocab.txt")
+            letters = "abcdefghijklmnopqrstuvwxyz"
+            with open(vocab_path, 'w') as f:
+                f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(letters)
+                                  + [f"##{c}" for c in letters]))
+            tokenizer = BertTokenizerFast(vocab_path)
+
+        model = CountingCrossEncoder()
+        model.tokenizer = tokenizer
+        ranker = self.make_ranker(model)
+        text = " ".join(["untouchability"] * 60 + ["sanskrit", "dharmashastra"])
+        windows = ranker.passage_windows(text)
+
+        token_counts = [len(tokenizer(w, add_special_tokens=False)["input_ids"]) for w in windows]
+        self.assertTrue(all(n <= 100 for n in token_counts))
+        # 60 words fit a 100-word window, but are 840 wordpieces
+        self.assertGreater(len(windows), 8)
+        self.assertTrue(windows[-1].endswith("dharmashastra"))
+        self.assertEqual(sum(token_counts) - 20 * (len(windows) - 1), len(tokenizer(text, add_special_tokens=False)["input_ids"]))
+
+    def test_long_chunk_scored_by_best_window(self):
+        model = TruncatingCrossEncoder(max_words=100)
+        ranker = self.make_ranker(model, early_exit_margin=100)
+        results = [
+            {"chunk_id": "SHORT", "text": "a social reformer", "dense_score": 0.9},
+            {"chunk_id": "LONG", "text": long_text(300, "caste is a social evil"), "dense_score": 0.8},
+        ]
+        ranked = ranker.rerank(results, "social evil", top_k=2)
+        # Whole-chunk scoring would truncate LONG before its relevant tail
+        self.assertEqual([r['chunk_id'] for r in ranked], ["LONG", "SHORT"])
+        self.assertEqual(ranked[0]['rerank_score'], 2)
+
+    def test_only_top_n_by_bi_encoder_reach_cross_encoder(self):
+        model = CountingCrossEncoder()
+        ranker = self.make_ranker(model, top_n=3)
+        results = [{"chunk_id": f"C{i}", "text": f"text {i}", "dense_score": i / 10} for i in range(10)]
+        ranked = ranker.rerank(results, "text", top_k=3)
+        self.assertEqual(sorted(t for _, t in model.seen), ["text 7", "text 8", "text 9"])
+        self.assertEqual(len(ranked), 3)
+
+    def test_pair_budget_bounds_model_calls(self):
+        model = CountingCrossEncoder()
+        ranker = self.make_ranker(model, top_n=6, max_pairs=8, early_exit_margin=100)
+        results = [{"chunk_id": f"C{i}", "text": long_text(1000, "social evil"), "dense_score": 1 - i / 10}
+                   for i in range(6)]
+        ranked = ranker.rerank(results, "social evil", top_k=5)
+        self.assertEqual(len(model.seen), 8)
+        self.assertEqual(len(ranked), 5)
+
+    def test_early_exit_skips_decided_losers(self):
+        model = CountingCrossEncoder()
+        ranker = self.make_ranker(model, early_exit_margin=0.5)
+        winner = "social evil " + long_text(200)
+        results = [{"chunk_id": "WIN", "text": winner, "dense_score": 0.5}] + [
+            {"chunk_id": f"LOSE{i}", "text": long_text(220), "dense_score": 0.4} for i in range(2)
+        ]
+        ranked = ranker.rerank(results, "social evil", top_k=1)
+        self.assertEqual(ranked[0]['chunk_id'], "WIN")
+        # Round one scores every first window; after that only the winner's remaining windows
+        self.assertEqual(len(model.seen), 3 + len(ranker.passage_windows(winner)) - 1)
+
+    def test_default_config_covers_long_chunks_and_cuts_losers(self):
+        class LogitCrossEncoder(CountingCrossEncoder):
+            # Logit-like scale: -4 for no overlap, +4 per shared word
+            def predict(self, pairs):
+                return [4.0 * s - 4.0 for s in super().predict(pairs)]
+
+        model = LogitCrossEncoder()
+        ranker = Ranker(model=model)  # settings from config.yaml
+        chunk_words = config['chunking']['chunk_size_tokens']
+
+        winner_text = "social evil " + long_text(chunk_words - 5, "caste social evil")
+        results = [{"chunk_id": f"WIN{i}", "text": winner_text, "dense_score": 0.9 - i / 100} for i in range(5)]
+        loser_text = " ".join(["unrelated"] * chunk_words)
+        results += [{"chunk_id": f"LOSE{i}", "text": loser_text, "dense_score": 0.5} for i in range(3)]
+        windows = [ranker.passage_windows(r['text']) for r in results]
+        self.assertGreater(len(windows[0]), 2)
+        ranked = ranker.rerank(results, "caste social evil", top_k=5)
+
+        # Every winner was scored down to its last window, where the best match is
+        self.assertEqual([r['chunk_id'] for r in ranked], [f"WIN{i}" for i in range(5)])
+        self.assertTrue(all(r['rerank_score'] == 8.0 for r in ranked))
+        # Losers were cut after their first window
+        self.assertEqual(len([t for _, t in model.seen if "unrelated" in t]), 3)
+        self.assertLessEqual(len(model.seen), ranker.pair_budget([len(w) for w in windows], 5))
+
+    def test_matches_exhaustive_max_pooling_without_cuts(self):
+        model = CountingCrossEncoder()
+        ranker = self.make_ranker(model, top_n=10, max_pairs=10 ** 6, early_exit_margin=float("inf"))
+        rng = np.random.default_rng(0)
+        vocab = ["caste", "social", "evil", "democracy", "liberty", "law", "filler", "reform"]
+        results = [{"chunk_id": f"C{i}", "text": " ".join(rng.choice(vocab, size=int(rng.integers(20, 400)))),
+                    "dense_score": float(rng.random())} for i in range(10)]
+        query = "social reform and caste law"
+        expected = sorted(
+            ((max(model.predict([[query, w]])[0] for w in ranker.passage_windows(r['text'])), r['chunk_id'])
+             for r in results), key=lambda pair: -pair[0])
+        ranked = ranker.rerank([dict(r) for r in results], query, top_k=5)
+        self.assertEqual([r['rerank_score'] for r in ranked], [score for score, _ in expected[:5]])
+
+class TestEntityIndex(unittest.TestCase):
+    def setUp(self):
+        # Clustered synthetic embeddings, so IVF cells are meaningful
+        rng = np.random.default_rng(42)
+        centers = rng.normal(size=(20, 32))
+        self.embeddings = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.3, size=(1000, 32))
+        self.queries = centers + rng.normal(scale=0.3, size=centers.shape)
+
+    def test_exact_matches_brute_force(self):
+        index = ExactIndex(self.embeddings)
+        ids, scores = index.search(self.queries[0], top_k=10, threshold=0.3)
+
+        normed = self.embeddings / np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+        q = self.queries[0] / np.linalg.norm(self.queries[0])
+        brute = normed @ q
+        expected = [i for i in np.argsort(-brute) if brute[i] > 0.3][:10]
+
+        self.assertEqual(ids.tolist(), expected)
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_threshold_filters_everything(self):
+        index = ExactIndex(self.embeddings)
+        ids, _ = index.search(self.queries[0], top_k=10, threshold=1.01)
+        self.assertEqual(len(ids), 0)
+
+    def test_ivf_recall_against_exact(self):
+        exact = ExactIndex(self.embeddings)
+        ivf = IVFIndex(self.embeddings, nlist=20, nprobe=4)
+        self.assertGreaterEqual(recall_at_k(ivf, exact, self.queries, top_k=10, threshold=0.3), 0.9)
+
+def neighbour_walk_search(search, query_emb, top_k, threshold=0.3):
+    """Chunk scoring as it was before the incidence matrix: walk each relevant entity's neighbours."""
+    entity_ids, entity_scores = search.entity_index.search(query_emb, top_k=search.entity_fanout, threshold=threshold)
+    retrieved_chunks = {}
+    for entity_id, score in zip(entity_ids, entity_scores):
+        entity = search.entity_nodes[entity_id]
+        for neighbor in search.graph.neighbors(entity):
+            if neighbor.startswith("CHUNK_"):
+                if neighbor not in retrieved_chunks:
+                    retrieved_chunks[neighbor] = {"chunk_id": neighbor, "score": score, "source_entity": entity}
+                else:
+                    retrieved_chunks[neighbor]['score'] += 0.1
+    results = sorted(retrieved_chunks.values(), key=lambda x: x['score'], reverse=True)
+    return results[:top_k]
+
+class TestLocalSearchScoring(unittest.TestCase):
+    def setUp(self):
+        # Caste and Varna share an embedding (tied entity scores); Dhamma is below the threshold
+        vectors = {
+            "Caste": [1.0, 0.0, 0.0], "Varna": [1.0, 0.0, 0.0],
+            "Gandhi": [0.6, 0.8, 0.0], "Dhamma": [0.0, 0.0, 1.0],
+        }
+        edges = [("Varna", 3), ("Caste", 4), ("Caste", 1), ("Varna", 0), ("Gandhi", 2),
+                 ("Gandhi", 4), ("Gandhi", 5), ("Dhamma", 5), ("Caste", 6), ("Varna", 6)]
+        graph = nx.Graph()
+        for name in vectors:
+            graph.add_node(name, type='entity')
+        for i in [5, 2, 0, 6, 3, 1, 4]:
+            graph.add_node(f"CHUNK_{i}", type='chunk')
+        for entity, chunk in edges:
+            graph.add_edge(entity, f"CHUNK_{chunk}")
+
+        self.query_emb = np.array([[1.0, 0.0, 0.0]], dtype=np.float32)
+        embedder = types.SimpleNamespace(encode_query=lambda q: self.query_emb)
+        view = GraphView.from_networkx(graph)
+        self.search = LocalSearch(
+            embedder=embedder, graph=view,
+            chunks=[{"id": i, "text": f"Chunk {i}"} for i in range(7)],
+            entity_embeddings=np.array([vectors[n] for n in view.nodes_of_type('entity')], dtype=np.float32),
+        )
+
+    def test_matches_neighbour_walk_including_ties(self):
+        for top_k in range(1, 9):
+            expected = neighbour_walk_search(self.search, self.query_emb, top_k)
+            results = self.search.search("caste", top_k=top_k)
+            self.assertEqual([(r["chunk_id"], r["source_entity"]) for r in results],
+                             [(r["chunk_id"], r["source_entity"]) for r in expected])
+            for got, want in zip(results, expected):
+                self.assertAlmostEqual(float(got["score"]), float(want["score"]), places=5)
+
+    def test_no_entity_above_threshold(self):
+        self.query_emb = np.array([[0.0, -1.0, 0.0]], dtype=np.float32)
+        self.assertEqual(self.search.search("nothing"), [])
+
+class TestEntityMatcher(unittest.TestCase):
+    def test_matches_substring_semantics(self):
+        names = ["Caste", "caste system", "Manu", "he", "Endogamy", "CASTE", "Sati"]
+        matcher = EntityMatcher(names)
+        text = "The Caste System was, per Manu, sustained by endogamy."
+
+        expected = [n for n in names if n.lower() in text.lower()]
+        self.assertEqual(matcher.find(text), expected)
+
+    def test_no_matches(self):
+        matcher = EntityMatcher(["Caste", "Manu"])
+        self.assertEqual(matcher.find("Nothing relevant here."), [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file